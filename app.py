@@ -1,28 +1,26 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, send_from_directory, make_response, session, send_file
+from flask import Flask, render_template, request, jsonify, redirect, url_for, send_from_directory, make_response, session, send_file, Response, stream_with_context
 from datetime import datetime
 from langchain_core import embeddings
 from werkzeug.utils import secure_filename
 import os
 import subprocess
 import sys
-import io
 import json
 # UPDATED IMPORT: Import both generate_quiz and the new grade_quiz function
-from backend.quizes import generate_quiz, grade_quiz 
+from backend.quizes import generate_quiz, generate_quiz_stream, grade_quiz_bytes 
 from backend.flashcards import generate_flashcards
 from backend.query_rag import query_book_rag
 from rag_com.indexer import indexer
 from backend.slide_decks import generate_slide_deck, create_pdf_from_slides
-from backend.manage_books import query_book_content
+from backend.manage_books import query_book_content, get_embeddings
 from backend.agentic_agent import agentic_agent
 from backend.exam_reviewer import index_study_materials, review_exam, EXAM_FILES_DIR
 from backend.learning_agent import process_learning_query
-from langchain_huggingface import HuggingFaceEmbeddings
 
 app = Flask(__name__)
 app.config['BOOKS_FOLDER'] = 'books'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+embeddings = get_embeddings()  # shared with manage_books, loaded once per process
 from dotenv import load_dotenv
 load_dotenv()
 # app.secret_key = 'your-secret-key-here'  # Required for session
@@ -97,6 +95,27 @@ def generate_quiz_route():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route("/generate_quiz_stream", methods=["POST"])
+def generate_quiz_stream_route():
+    """Stream generated quiz questions as newline-delimited JSON"""
+    data = request.get_json()
+    questions = generate_quiz_stream(
+        prompt=data.get('prompt'),
+        num_questions=data.get('num_questions', 10),
+        difficulty=data.get('difficulty', 'Medium'),
+        mcq_percent=data.get('mcq_percent', 70)
+    )
+    
+    def ndjson():
+        try:
+            for question in questions:
+                yield json.dumps({'question': question}) + "\n"
+            yield json.dumps({'status': 'done'}) + "\n"
+        except Exception as e:
+            yield json.dumps({'error': str(e)}) + "\n"
+    
+    return Response(stream_with_context(ndjson()), mimetype='application/x-ndjson')
+
 # =========================================================
 # NEW GRADING ROUTE
 # =========================================================
@@ -111,8 +130,7 @@ def grade_quiz_route():
 
     try:
         # Call the new grading function
-        graded_results = grade_quiz(quiz_data, user_answers)
-        return jsonify(graded_results)
+        return Response(grade_quiz_bytes(quiz_data, user_answers), mimetype='application/json')
     except Exception as e:
         print(f"Grading Error: {str(e)}")
         return jsonify({"error": f"Failed to grade quiz: {str(e)}"}), 500
@@ -136,6 +154,7 @@ def generate_slide_deck_route():
         prompt = data.get("prompt")
         use_rag = bool(data.get("use_rag", False))
         book_name = data.get("book_name") if use_rag else None
+        fast_mode = bool(data.get("fast_mode", False))
 
         if not title:
             return jsonify({"error": "Title is required"}), 400
@@ -144,10 +163,10 @@ def generate_slide_deck_route():
         if use_rag and not book_name:
             return jsonify({"error": "book_name is required when use_rag is True"}), 400
 
-        print(f"Title: {title}, Prompt: {prompt}, Use RAG: {use_rag}, Book Name: {book_name}")
+        print(f"Title: {title}, Prompt: {prompt}, Use RAG: {use_rag}, Book Name: {book_name}, Fast Mode: {fast_mode}")
 
         # Generate slide deck using the original function
-        slide_deck_json = generate_slide_deck(embeddings, title, prompt, use_rag, book_name)
+        slide_deck_json = generate_slide_deck(embeddings, title, prompt, use_rag, book_name, fast_mode=fast_mode)
         print(f"SLIDE GENERATION DONE")
         return jsonify(slide_deck_json)
 
@@ -378,14 +397,10 @@ def download_slide_deck_pdf():
             return jsonify({'error': 'No slide deck data provided'}), 400
             
         try:
-            # Generate PDF
-            pdf_data = create_pdf_from_slides(data)
-            if not pdf_data:
+            # Generate PDF (returned as a BytesIO already at position 0)
+            buffer = create_pdf_from_slides(data)
+            if not buffer.getbuffer().nbytes:
                 return jsonify({'error': 'Failed to generate PDF - empty data'}), 500
-                
-            # Create buffer with PDF data
-            buffer = io.BytesIO(pdf_data)
-            buffer.seek(0)  # Move to start of buffer
             
             # Get timestamp for filename
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -793,25 +808,17 @@ def list_learning_agent_sessions():
     """List all learning agent sessions"""
     try:
         from backend.history_manager import HistoryManager
-        import os
         
-        sessions = []
-        history_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chat_history', 'learning_agent')
-        
-        if os.path.exists(history_dir):
-            for filename in os.listdir(history_dir):
-                if filename.endswith('.json'):
-                    session_id = filename[:-5]
-                    manager = HistoryManager.load_session(session_id)
-                    if manager:
-                        history = manager.get_full_history()
-                        sessions.append({
-                            'session_id': session_id,
-                            'created_at': history.get('created_at', ''),
-                            'last_updated': history.get('last_updated', ''),
-                            'message_count': len(history.get('turns', [])),
-                            'first_message': history['turns'][0]['user_input'][:50] if history.get('turns') else 'New Chat'
-                        })
+        sessions = [
+            {
+                'session_id': summary['session_id'],
+                'created_at': summary['created_at'],
+                'last_updated': summary['last_updated'],
+                'message_count': summary['num_turns'],
+                'first_message': summary['first_message'] or 'New Chat'
+            }
+            for summary in HistoryManager.list_session_summaries(limit=None)
+        ]
         
         # Sort by last_updated (newest first)
         sessions.sort(key=lambda x: x.get('last_updated', ''), reverse=True)
@@ -1,25 +1,88 @@
 """
 History Manager for Adaptive Learning Agent
 Handles conversation persistence and context management
+Sessions are stored in SQLite via backend.history_store
 """
 
 import os
-import json
-import uuid
+import sys
+import copy
+import time
+import secrets
+import itertools
+from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 
-# History storage directory
+import orjson
+
+from backend import history_store
+from backend.session_cache import session_cache
+
+# Legacy JSON history directory (imported into SQLite on first load)
 HISTORY_DIR = os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
     "chat_history",
     "learning_agent"
 )
 
+# Legacy turn logs were stored one JSON record per line next to the session file
+TURNS_SUFFIX = ".turns.jsonl"
+
+# Message roles used when formatting history for the LLM
+ROLE_USER = sys.intern("user")
+ROLE_MODEL = sys.intern("model")
+
+# Tool names recorded in turn metadata
+TOOL_UNIFIED_SEARCH = sys.intern("unified_search")
+TOOL_OCR = sys.intern("ocr")
+
+# Legacy JSON sessions are swept into SQLite once per process
+_legacy_sessions_imported = False
+
+# Per-process counter so IDs created within the same nanosecond stay unique
+_sid_counter = itertools.count()
+
 # Ensure directory exists
 os.makedirs(HISTORY_DIR, exist_ok=True)
 
 
+@dataclass
+class Turn:
+    """A single conversation turn"""
+    __slots__ = ("turn_id", "timestamp", "user_input", "agent_response", "metadata")
+    
+    turn_id: int
+    timestamp: str
+    user_input: str
+    agent_response: str
+    metadata: Dict[str, Any]
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Turn':
+        """Build a turn from its stored JSON form"""
+        return cls(
+            turn_id=data["turn_id"],
+            timestamp=data["timestamp"],
+            user_input=data["user_input"],
+            agent_response=data["agent_response"],
+            metadata=data.get("metadata") or {}
+        )
+    
+    @classmethod
+    def from_row(cls, row: Tuple[int, str, str, str, Dict[str, Any]]) -> 'Turn':
+        """Build a turn from a history_store row tuple"""
+        return cls(*row)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the turn to its JSON-serializable form"""
+        return asdict(self)
+    
+    def to_row(self) -> Tuple[int, str, str, str, Dict[str, Any]]:
+        """Convert the turn to a history_store row tuple"""
+        return (self.turn_id, self.timestamp, self.user_input, self.agent_response, self.metadata)
+
+
 class HistoryManager:
     """Manages conversation history for the learning agent"""
     
@@ -31,8 +94,8 @@ class HistoryManager:
             session_id: Optional existing session ID, creates new if None
         """
         self.session_id = session_id or self.create_session()
-        self.session_file = os.path.join(HISTORY_DIR, f"{self.session_id}.json")
-        self.history = self._load_session()
+        self.history, self.turns = self._load_session()
+        self._llm_context_cache = None
     
     def create_session(self, user_id: Optional[str] = None) -> str:
         """
@@ -44,51 +107,126 @@ class HistoryManager:
         Returns:
             str: New session ID
         """
-        session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
-        
-        session_data = {
-            "session_id": session_id,
-            "user_id": user_id,
-            "created_at": datetime.now().isoformat(),
-            "last_updated": datetime.now().isoformat(),
-            "turns": [],
-            "metadata": {
+        # Hex nanosecond timestamp keeps IDs sortable by creation time
+        session_id = f"session_{time.time_ns():x}_{next(_sid_counter):x}_{secrets.token_hex(4)}"
+        
+        history_store.create_session(
+            session_id,
+            created_at=datetime.now().isoformat(),
+            metadata={
                 "total_turns": 0,
                 "tools_used": [],
                 "topics_discussed": []
-            }
-        }
-        
-        session_file = os.path.join(HISTORY_DIR, f"{session_id}.json")
-        with open(session_file, 'w', encoding='utf-8') as f:
-            json.dump(session_data, f, indent=2, ensure_ascii=False)
+            },
+            user_id=user_id
+        )
         
         return session_id
     
-    def _load_session(self) -> Dict:
-        """Load session data from file"""
-        if os.path.exists(self.session_file):
-            with open(self.session_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            # Create new session if file doesn't exist
-            return {
+    def _load_session(self) -> Tuple[Dict, List[Turn]]:
+        """Load session data and turns, served from the session cache when unchanged"""
+        version = history_store.get_session_version(self.session_id)
+        
+        if version is None and self._import_legacy_session(self.session_id):
+            version = history_store.get_session_version(self.session_id)
+        
+        if version is None:
+            # Create new session if it doesn't exist
+            now = datetime.now().isoformat()
+            history = {
                 "session_id": self.session_id,
-                "created_at": datetime.now().isoformat(),
-                "last_updated": datetime.now().isoformat(),
-                "turns": [],
+                "user_id": None,
+                "created_at": now,
+                "last_updated": now,
                 "metadata": {
                     "total_turns": 0,
                     "tools_used": [],
                     "topics_discussed": []
                 }
             }
+            history_store.create_session(self.session_id, now, history["metadata"])
+            return history, []
+        
+        history, turns = session_cache.get(self.session_id, version, self._read_session)
+        
+        # Copy the mutable parts so this manager never changes the cached entry
+        history = {**history, "metadata": copy.deepcopy(history["metadata"])}
+        return history, list(turns)
+    
+    def _read_session(self) -> Tuple[Tuple[Dict, List[Turn]], int]:
+        """Read session data and turns from the database for the session cache"""
+        history = history_store.get_session(self.session_id)
+        turns = [Turn.from_row(row) for row in history_store.get_turns(self.session_id)]
+        
+        # Rough size estimate for the cache budget
+        size = sum(len(turn.user_input) + len(turn.agent_response) + 256 for turn in turns)
+        return (history, turns), size
+    
+    @staticmethod
+    def _import_legacy_session(session_id: str) -> bool:
+        """
+        Import a session stored as JSON (and optional JSONL turn log) on disk
+        
+        Args:
+            session_id: Session ID to import
+            
+        Returns:
+            bool: True if a legacy session was found and imported
+        """
+        session_file = os.path.join(HISTORY_DIR, f"{session_id}.json")
+        if not os.path.exists(session_file):
+            return False
+        
+        with open(session_file, 'rb') as f:
+            session = orjson.loads(f.read())
+        
+        turns_file = os.path.join(HISTORY_DIR, f"{session_id}{TURNS_SUFFIX}")
+        if os.path.exists(turns_file):
+            with open(turns_file, 'rb') as f:
+                turns = [Turn.from_dict(orjson.loads(line)) for line in f if line.strip()]
+        else:
+            turns = [Turn.from_dict(turn) for turn in session.get("turns", [])]
+        
+        now = datetime.now().isoformat()
+        session.setdefault("session_id", session_id)
+        session.setdefault("created_at", now)
+        session.setdefault("last_updated", now)
+        session.setdefault("metadata", {"total_turns": 0, "tools_used": [], "topics_discussed": []})
+        
+        history_store.import_session(session, [turn.to_row() for turn in turns])
+        return True
+    
+    @staticmethod
+    def _import_legacy_sessions():
+        """Import every legacy JSON session not yet in the database (once per process)"""
+        global _legacy_sessions_imported
+        if _legacy_sessions_imported:
+            return
+        _legacy_sessions_imported = True
+        
+        if not os.path.exists(HISTORY_DIR):
+            return
+        
+        with os.scandir(HISTORY_DIR) as entries:
+            legacy_ids = [
+                entry.name[:-5]  # Remove .json extension
+                for entry in entries
+                if entry.name.endswith('.json') and entry.is_file(follow_symlinks=False)
+            ]
+        
+        for session_id in legacy_ids:
+            if not history_store.session_exists(session_id):
+                HistoryManager._import_legacy_session(session_id)
     
     def _save_session(self):
-        """Save session data to file"""
+        """Save session-level data to the database"""
         self.history["last_updated"] = datetime.now().isoformat()
-        with open(self.session_file, 'w', encoding='utf-8') as f:
-            json.dump(self.history, f, indent=2, ensure_ascii=False)
+        history_store.update_session(
+            self.session_id,
+            self.history["last_updated"],
+            len(self.turns),
+            self.history["metadata"]
+        )
     
     def save_turn(
         self,
@@ -99,31 +237,41 @@ class HistoryManager:
         """
         Save a conversation turn
         
+        The turn is inserted as one row and the session row is updated in
+        the same transaction.
+        
         Args:
             user_input: User's input text
             agent_response: Agent's response
             metadata: Optional metadata (tools used, confidence, etc.)
         """
-        turn = {
-            "turn_id": len(self.history["turns"]) + 1,
-            "timestamp": datetime.now().isoformat(),
-            "user_input": user_input,
-            "agent_response": agent_response,
-            "metadata": metadata or {}
-        }
+        turn = Turn(
+            turn_id=len(self.turns) + 1,
+            timestamp=datetime.now().isoformat(),
+            user_input=user_input,
+            agent_response=agent_response,
+            metadata=metadata or {}
+        )
         
-        self.history["turns"].append(turn)
-        self.history["metadata"]["total_turns"] = len(self.history["turns"])
+        self.turns.append(turn)
+        self.history["metadata"]["total_turns"] = len(self.turns)
         
         # Update tools used
         if metadata and "tools_used" in metadata:
             for tool in metadata["tools_used"]:
+                tool = sys.intern(tool)
                 if tool not in self.history["metadata"]["tools_used"]:
                     self.history["metadata"]["tools_used"].append(tool)
         
-        self._save_session()
+        self.history["last_updated"] = turn.timestamp
+        history_store.add_turn(
+            self.session_id,
+            turn.to_row(),
+            self.history["last_updated"],
+            self.history["metadata"]
+        )
     
-    def get_recent_context(self, num_turns: int = 5) -> List[Dict]:
+    def get_recent_context(self, num_turns: int = 5) -> List[Turn]:
         """
         Get recent conversation turns for context
         
@@ -133,11 +281,11 @@ class HistoryManager:
         Returns:
             List of recent conversation turns
         """
-        return self.history["turns"][-num_turns:] if self.history["turns"] else []
+        return self.turns[-num_turns:] if self.turns else []
     
     def get_full_history(self) -> Dict:
         """Get complete session history"""
-        return self.history
+        return {**self.history, "turns": [turn.to_dict() for turn in self.turns]}
     
     def summarize_history(self, max_chars: int = 500) -> str:
         """
@@ -149,20 +297,18 @@ class HistoryManager:
         Returns:
             str: Summary of conversation
         """
-        if not self.history["turns"]:
+        if not self.turns:
             return "No previous conversation."
         
         recent_turns = self.get_recent_context(3)
         
-        summary_parts = []
-        for turn in recent_turns:
-            user_text = turn["user_input"][:100]
-            agent_text = turn["agent_response"][:100]
-            summary_parts.append(f"User: {user_text}...")
-            summary_parts.append(f"Agent: {agent_text}...")
+        # Called on every learning query, so fill a preallocated list
+        summary_parts = [None] * (len(recent_turns) * 2)
+        for i, turn in enumerate(recent_turns):
+            summary_parts[2 * i] = "User: " + turn.user_input[:100] + "..."
+            summary_parts[2 * i + 1] = "Agent: " + turn.agent_response[:100] + "..."
         
-        summary = "\n".join(summary_parts)
-        return summary[:max_chars]
+        return "\n".join(summary_parts)[:max_chars]
     
     def get_conversation_for_llm(self, num_turns: int = 3) -> List[Dict[str, str]]:
         """
@@ -174,33 +320,83 @@ class HistoryManager:
         Returns:
             List of dicts with 'role' and 'content' for LLM
         """
-        recent_turns = self.get_recent_context(num_turns)
-        
-        formatted = []
-        for turn in recent_turns:
-            formatted.append({
-                "role": "user",
-                "content": turn["user_input"]
-            })
-            formatted.append({
-                "role": "model",
-                "content": turn["agent_response"]
-            })
+        # Phase 1 and Phase 2 ask for the same context back to back, so reuse
+        # the last result until a turn is added
+        cache_key = (self.session_id, len(self.turns), num_turns)
+        if self._llm_context_cache and self._llm_context_cache[0] == cache_key:
+            return self._llm_context_cache[1]
         
+        formatted = [
+            message
+            for turn in self.get_recent_context(num_turns)
+            for message in (
+                {"role": ROLE_USER, "content": turn.user_input},
+                {"role": ROLE_MODEL, "content": turn.agent_response}
+            )
+        ]
+        
+        self._llm_context_cache = (cache_key, formatted)
         return formatted
     
     @staticmethod
-    def list_sessions() -> List[str]:
-        """List all available session IDs"""
-        if not os.path.exists(HISTORY_DIR):
-            return []
+    def list_sessions(limit: Optional[int] = 100) -> List[str]:
+        """
+        List available session IDs, most recent first
+        
+        Args:
+            limit: Maximum number of sessions to return (None for all)
+            
+        Returns:
+            List of session IDs
+        """
+        HistoryManager._import_legacy_sessions()
+        return history_store.list_session_ids(limit)
+    
+    @staticmethod
+    def list_session_summaries(limit: Optional[int] = 10) -> List[Dict[str, Any]]:
+        """
+        List session summaries without loading any turns
         
-        sessions = []
-        for filename in os.listdir(HISTORY_DIR):
-            if filename.endswith('.json'):
-                sessions.append(filename[:-5])  # Remove .json extension
+        Args:
+            limit: Maximum number of sessions to return (None for all)
+            
+        Returns:
+            List of dicts with session_id, created_at, last_updated,
+            num_turns and first_message, most recent first
+        """
+        HistoryManager._import_legacy_sessions()
+        return history_store.list_session_summaries(limit)
+    
+    @staticmethod
+    def get_summary(session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a session's summary without loading its turns
         
-        return sorted(sessions, reverse=True)  # Most recent first
+        Args:
+            session_id: Session ID to look up
+            
+        Returns:
+            Dict with session_id, created_at, last_updated and num_turns,
+            or None if not found
+        """
+        summary = history_store.get_session_summary(session_id)
+        if summary is None and HistoryManager._import_legacy_session(session_id):
+            summary = history_store.get_session_summary(session_id)
+        return summary
+    
+    @staticmethod
+    def iter_turns(session_id: str) -> Iterator[Turn]:
+        """
+        Stream a session's turns in order, one at a time
+        
+        Args:
+            session_id: Session ID to read
+            
+        Yields:
+            Turn objects
+        """
+        for row in history_store.iter_turns(session_id):
+            yield Turn.from_row(row)
     
     @staticmethod
     def load_session(session_id: str) -> Optional['HistoryManager']:
@@ -213,15 +409,16 @@ class HistoryManager:
         Returns:
             HistoryManager instance or None if not found
         """
-        session_file = os.path.join(HISTORY_DIR, f"{session_id}.json")
-        if os.path.exists(session_file):
+        if history_store.get_session_version(session_id) or HistoryManager._import_legacy_session(session_id):
             return HistoryManager(session_id=session_id)
         return None
     
     def clear_history(self):
         """Clear all turns from current session"""
-        self.history["turns"] = []
+        history_store.delete_turns(self.session_id)
+        self.turns = []
         self.history["metadata"]["total_turns"] = 0
+        self._llm_context_cache = None
         self._save_session()
 
 
@@ -263,13 +460,13 @@ if __name__ == "__main__":
         metadata={"tools_used": ["unified_search"], "confidence": 0.92}
     )
     
-    print(f"   Saved {len(manager.history['turns'])} turns")
+    print(f"   Saved {len(manager.turns)} turns")
     
     # Get recent context
     print("\n3. Retrieving recent context...")
     context = manager.get_recent_context(2)
     for i, turn in enumerate(context, 1):
-        print(f"   Turn {i}: {turn['user_input'][:50]}...")
+        print(f"   Turn {i}: {turn.user_input[:50]}...")
     
     # Get summary
     print("\n4. Generating summary...")
@@ -0,0 +1,312 @@
+"""
+SQLite storage for learning agent conversation history
+Sessions and turns live in one database instead of one JSON file per session
+"""
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+
+import orjson
+
+DB_PATH = Path(__file__).parent.parent / 'chat_history' / 'learning_agent.db'
+
+_initialized = False
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a connection, creating the schema on first use"""
+    global _initialized
+
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute('PRAGMA synchronous=NORMAL')
+
+    if not _initialized:
+        init_db(conn)
+        _initialized = True
+
+    return conn
+
+
+def init_db(conn: sqlite3.Connection):
+    """Create tables and indexes if they don't exist"""
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id TEXT,
+            created_at TEXT NOT NULL,
+            last_updated TEXT NOT NULL,
+            num_turns INTEGER NOT NULL DEFAULT 0,
+            metadata_json TEXT NOT NULL DEFAULT '{}'
+        );
+
+        CREATE TABLE IF NOT EXISTS turns (
+            session_id TEXT NOT NULL,
+            turn_id INTEGER NOT NULL,
+            timestamp TEXT NOT NULL,
+            user_input TEXT NOT NULL,
+            agent_response TEXT NOT NULL,
+            metadata_json TEXT NOT NULL DEFAULT '{}'
+        );
+
+        -- Recent-session listing is served straight from this index
+        DROP INDEX IF EXISTS idx_sessions_created;
+        CREATE INDEX IF NOT EXISTS idx_sessions_created_desc ON sessions(created_at DESC, session_id);
+
+        -- Per-session turn loads are an ordered range scan
+        DROP INDEX IF EXISTS idx_turns_session;
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_turns_session_turn ON turns(session_id, turn_id ASC);
+    ''')
+    conn.commit()
+
+
+def create_session(
+    session_id: str,
+    created_at: str,
+    metadata: Dict[str, Any],
+    user_id: Optional[str] = None
+):
+    """Insert a new, empty session row"""
+    with closing(_connect()) as conn:
+        conn.execute(
+            'INSERT INTO sessions (session_id, user_id, created_at, last_updated, num_turns, metadata_json) '
+            'VALUES (?, ?, ?, ?, 0, ?)',
+            (session_id, user_id, created_at, created_at, orjson.dumps(metadata).decode())
+        )
+        conn.commit()
+
+
+def get_session(session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch session-level data
+
+    Returns:
+        Dict with session fields, or None if the session doesn't exist
+    """
+    with closing(_connect()) as conn:
+        row = conn.execute(
+            'SELECT session_id, user_id, created_at, last_updated, metadata_json '
+            'FROM sessions WHERE session_id = ?',
+            (session_id,)
+        ).fetchone()
+
+    if not row:
+        return None
+
+    return {
+        'session_id': row[0],
+        'user_id': row[1],
+        'created_at': row[2],
+        'last_updated': row[3],
+        'metadata': orjson.loads(row[4])
+    }
+
+
+def session_exists(session_id: str) -> bool:
+    """Check whether a session row exists"""
+    with closing(_connect()) as conn:
+        row = conn.execute(
+            'SELECT 1 FROM sessions WHERE session_id = ?', (session_id,)
+        ).fetchone()
+    return row is not None
+
+
+def get_session_version(session_id: str) -> Optional[Tuple[str, int]]:
+    """
+    Fetch a token that changes whenever the session or its turns change
+
+    Returns:
+        (last_updated, num_turns) tuple, or None if the session doesn't exist
+    """
+    with closing(_connect()) as conn:
+        row = conn.execute(
+            'SELECT last_updated, num_turns FROM sessions WHERE session_id = ?',
+            (session_id,)
+        ).fetchone()
+    return tuple(row) if row else None
+
+
+def get_turns(session_id: str) -> List[Tuple[int, str, str, str, Dict[str, Any]]]:
+    """
+    Fetch all turns of a session in order
+
+    Returns:
+        List of (turn_id, timestamp, user_input, agent_response, metadata) tuples
+    """
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            'SELECT turn_id, timestamp, user_input, agent_response, metadata_json '
+            'FROM turns WHERE session_id = ? ORDER BY turn_id',
+            (session_id,)
+        ).fetchall()
+    return [(r[0], r[1], r[2], r[3], orjson.loads(r[4])) for r in rows]
+
+
+def iter_turns(
+    session_id: str,
+    batch_size: int = 100
+) -> Iterator[Tuple[int, str, str, str, Dict[str, Any]]]:
+    """
+    Stream the turns of a session in order without loading them all at once
+
+    Args:
+        session_id: Session to read
+        batch_size: Rows fetched from the cursor per round trip
+
+    Yields:
+        (turn_id, timestamp, user_input, agent_response, metadata) tuples
+    """
+    with closing(_connect()) as conn:
+        cursor = conn.execute(
+            'SELECT turn_id, timestamp, user_input, agent_response, metadata_json '
+            'FROM turns WHERE session_id = ? ORDER BY turn_id',
+            (session_id,)
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for r in rows:
+                yield (r[0], r[1], r[2], r[3], orjson.loads(r[4]))
+
+
+def add_turn(
+    session_id: str,
+    turn: Tuple[int, str, str, str, Dict[str, Any]],
+    last_updated: str,
+    metadata: Dict[str, Any]
+):
+    """
+    Insert a turn and update the session row in one transaction
+
+    Args:
+        session_id: Session the turn belongs to
+        turn: (turn_id, timestamp, user_input, agent_response, metadata) tuple
+        last_updated: New last_updated timestamp for the session
+        metadata: Updated session-level metadata
+    """
+    turn_id, timestamp, user_input, agent_response, turn_metadata = turn
+    with closing(_connect()) as conn:
+        with conn:
+            conn.execute(
+                'INSERT INTO turns (session_id, turn_id, timestamp, user_input, agent_response, metadata_json) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (session_id, turn_id, timestamp, user_input, agent_response,
+                 orjson.dumps(turn_metadata).decode())
+            )
+            conn.execute(
+                'UPDATE sessions SET last_updated = ?, num_turns = ?, metadata_json = ? '
+                'WHERE session_id = ?',
+                (last_updated, turn_id, orjson.dumps(metadata).decode(), session_id)
+            )
+
+
+def import_session(
+    session: Dict[str, Any],
+    turns: List[Tuple[int, str, str, str, Dict[str, Any]]]
+):
+    """Insert a complete session with its turns in one transaction"""
+    with closing(_connect()) as conn:
+        with conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO sessions (session_id, user_id, created_at, last_updated, num_turns, metadata_json) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (session['session_id'], session.get('user_id'), session['created_at'],
+                 session['last_updated'], len(turns), orjson.dumps(session['metadata']).decode())
+            )
+            conn.executemany(
+                'INSERT OR IGNORE INTO turns (session_id, turn_id, timestamp, user_input, agent_response, metadata_json) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(session['session_id'], t[0], t[1], t[2], t[3], orjson.dumps(t[4]).decode()) for t in turns]
+            )
+
+
+def update_session(
+    session_id: str,
+    last_updated: str,
+    num_turns: int,
+    metadata: Dict[str, Any]
+):
+    """Update session-level fields"""
+    with closing(_connect()) as conn:
+        conn.execute(
+            'UPDATE sessions SET last_updated = ?, num_turns = ?, metadata_json = ? '
+            'WHERE session_id = ?',
+            (last_updated, num_turns, orjson.dumps(metadata).decode(), session_id)
+        )
+        conn.commit()
+
+
+def delete_turns(session_id: str):
+    """Remove all turns of a session"""
+    with closing(_connect()) as conn:
+        conn.execute('DELETE FROM turns WHERE session_id = ?', (session_id,))
+        conn.commit()
+
+
+def get_session_summary(session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch a session's summary fields without reading any turns
+
+    Returns:
+        Dict with session_id, created_at, last_updated and num_turns,
+        or None if the session doesn't exist
+    """
+    with closing(_connect()) as conn:
+        row = conn.execute(
+            'SELECT session_id, created_at, last_updated, num_turns '
+            'FROM sessions WHERE session_id = ?',
+            (session_id,)
+        ).fetchone()
+
+    if not row:
+        return None
+
+    return {
+        'session_id': row[0],
+        'created_at': row[1],
+        'last_updated': row[2],
+        'num_turns': row[3]
+    }
+
+
+def list_session_ids(limit: Optional[int] = None) -> List[str]:
+    """List session IDs, most recent first"""
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            'SELECT session_id FROM sessions ORDER BY created_at DESC LIMIT ?',
+            (-1 if limit is None else limit,)
+        ).fetchall()
+    return [r[0] for r in rows]
+
+
+def list_session_summaries(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    List session summaries, most recent first, in a single query
+
+    Returns:
+        List of dicts with session_id, created_at, last_updated, num_turns
+        and the first 50 characters of the first user message
+    """
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            'SELECT s.session_id, s.created_at, s.last_updated, s.num_turns, '
+            '(SELECT substr(t.user_input, 1, 50) FROM turns t '
+            ' WHERE t.session_id = s.session_id ORDER BY t.turn_id LIMIT 1) '
+            'FROM sessions s ORDER BY s.created_at DESC LIMIT ?',
+            (-1 if limit is None else limit,)
+        ).fetchall()
+
+    return [
+        {
+            'session_id': r[0],
+            'created_at': r[1],
+            'last_updated': r[2],
+            'num_turns': r[3],
+            'first_message': r[4]
+        }
+        for r in rows
+    ]
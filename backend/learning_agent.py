@@ -5,6 +5,7 @@ Uses dual-phase Groq architecture for true agentic behavior:
 - Phase 2: Execute and Test
 """
 
+import io
 import os
 import sys
 import json
@@ -13,10 +14,10 @@ from typing import Dict, Optional, List, Any
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from tools.LLM_APIS import ask_groq_structured, ask_gemini_structured
+from tools.LLM_APIS import ask_groq_structured, ask_gemini_structured_stream, parse_structured_response
 from tools.ocr_tool import image_to_ocr_string
 from tools.unified_search import unified_search
-from backend.history_manager import HistoryManager
+from backend.history_manager import HistoryManager, TOOL_OCR, TOOL_UNIFIED_SEARCH
 
 
 # ==================== PHASE 1: ANALYZE & PLAN ====================
@@ -112,6 +113,47 @@ IMPORTANT:
 
 # ==================== PHASE 2: EXECUTE & TEST ====================
 
+# Static Phase 2 prompt; only the placeholders change between calls
+_PHASE_2_PROMPT_TEMPLATE = """You are an expert learning tutor. Your job is to help the user learn effectively.
+
+USER QUERY: "{user_input}"
+
+EXECUTION PLAN:
+{plan_json}
+
+AVAILABLE RESOURCES:
+{context_str}
+
+{conversation_context}
+
+YOUR TASK:
+Generate an educational response that helps the user learn. Follow the execution plan.
+
+GUIDELINES:
+1. Explain concepts clearly and step-by-step
+2. Use analogies and examples when helpful
+3. Adapt to the user's knowledge level
+4. Be encouraging and supportive
+5. Create a test/quiz question to validate understanding
+6. Suggest relevant follow-up topics
+
+OUTPUT FORMAT (STRICT JSON):
+{{
+  "response": "Your clear, educational explanation (3-5 paragraphs)",
+  "test_snippet": "A quiz question or code snippet to test understanding",
+  "confidence": 0.0-1.0 (how confident you are in this response),
+  "follow_up_suggestions": ["suggestion 1", "suggestion 2", "suggestion 3"],
+  "key_concepts": ["concept 1", "concept 2", "concept 3"]
+}}
+
+IMPORTANT:
+- Return ONLY valid JSON
+- No markdown, no explanations outside JSON
+- Make the response educational and engaging
+- The test_snippet should be practical and relevant
+"""
+
+
 def phase_2_execute_and_test(
     user_input: str,
     plan: Dict[str, Any],
@@ -141,66 +183,53 @@ def phase_2_execute_and_test(
     """
     
     # Build context from available resources
-    context_parts = []
+    context = io.StringIO()
     
     if ocr_text:
-        context_parts.append(f"Text from image: {ocr_text}")
+        context.write("Text from image: ")
+        context.write(ocr_text)
     
     if search_results:
         if search_results.get('web_search'):
             web = search_results['web_search']
-            context_parts.append(f"Web source ({web['title']}): {web['content'][:800]}")
+            if context.tell():
+                context.write("\n\n")
+            context.write(f"Web source ({web['title']}): ")
+            context.write(web['content'][:800])
         
         if search_results.get('wikipedia_search'):
             wiki = search_results['wikipedia_search']
-            context_parts.append(f"Wikipedia ({wiki['title']}): {wiki['content'][:800]}")
-    
-    context_str = "\n\n".join(context_parts) if context_parts else "No external resources available"
-    
-    prompt = f"""You are an expert learning tutor. Your job is to help the user learn effectively.
-
-USER QUERY: "{user_input}"
-
-EXECUTION PLAN:
-{json.dumps(plan, indent=2)}
-
-AVAILABLE RESOURCES:
-{context_str}
-
-{f'CONVERSATION CONTEXT: {history_summary}' if history_summary else ''}
-
-YOUR TASK:
-Generate an educational response that helps the user learn. Follow the execution plan.
-
-GUIDELINES:
-1. Explain concepts clearly and step-by-step
-2. Use analogies and examples when helpful
-3. Adapt to the user's knowledge level
-4. Be encouraging and supportive
-5. Create a test/quiz question to validate understanding
-6. Suggest relevant follow-up topics
-
-OUTPUT FORMAT (STRICT JSON):
-{{
-  "response": "Your clear, educational explanation (3-5 paragraphs)",
-  "test_snippet": "A quiz question or code snippet to test understanding",
-  "confidence": 0.0-1.0 (how confident you are in this response),
-  "follow_up_suggestions": ["suggestion 1", "suggestion 2", "suggestion 3"],
-  "key_concepts": ["concept 1", "concept 2", "concept 3"]
-}}
-
-IMPORTANT:
-- Return ONLY valid JSON
-- No markdown, no explanations outside JSON
-- Make the response educational and engaging
-- The test_snippet should be practical and relevant
-"""
+            if context.tell():
+                context.write("\n\n")
+            context.write(f"Wikipedia ({wiki['title']}): ")
+            context.write(wiki['content'][:800])
+    
+    context_str = context.getvalue() or "No external resources available"
+    
+    prompt = _PHASE_2_PROMPT_TEMPLATE.format_map({
+        "user_input": user_input,
+        # json.dumps (not orjson) keeps the \uXXXX escapes, so the prompt
+        # text matches the original for non-ASCII plans too
+        "plan_json": json.dumps(plan, indent=2),
+        "context_str": context_str,
+        "conversation_context": f"CONVERSATION CONTEXT: {history_summary}" if history_summary else ""
+    })
     
     print("🎓 Phase 2: Executing and Creating Response...")
-    result = ask_gemini_structured(
-        prompt=prompt,
-        use_learning_key=True
-    )
+    # Stream the response into a single buffer instead of holding the full
+    # response object alongside the parsed dict
+    buffer = io.StringIO()
+    try:
+        for chunk in ask_gemini_structured_stream(
+            prompt=prompt,
+            use_learning_key=True
+        ):
+            buffer.write(chunk)
+        result = parse_structured_response(buffer.getvalue().strip())
+    except Exception as e:
+        result = {"error": f"Gemini Error: {e}"}
+    finally:
+        buffer.close()
     
     if "error" in result:
         print(f"    Error: {result['error']}")
@@ -234,7 +263,8 @@ IMPORTANT:
 def process_learning_query(
     user_input: str,
     image_path: Optional[str] = None,
-    session_id: Optional[str] = None
+    session_id: Optional[str] = None,
+    prefetched_search: Optional[Dict] = None
 ) -> Dict[str, Any]:
     """
     Main orchestrator for the learning agent
@@ -244,6 +274,8 @@ def process_learning_query(
         user_input: User's query or input
         image_path: Optional path to image file
         session_id: Optional session ID for history
+        prefetched_search: Optional unified_search result fetched ahead of
+            time for this query, used instead of searching again
         
     Returns:
         Complete response dictionary with all metadata
@@ -277,7 +309,7 @@ def process_learning_query(
             ocr_text = None
     
     # Get conversation history summary
-    history_summary = history_manager.summarize_history() if history_manager.history["turns"] else None
+    history_summary = history_manager.summarize_history() if history_manager.turns else None
     
     # PHASE 1: Analyze and Plan
     print()
@@ -292,9 +324,14 @@ def process_learning_query(
     tools_used = []
     
     if image_path:
-        tools_used.append("ocr")
+        tools_used.append(TOOL_OCR)
+    
+    if plan.get("needs_search", False) and prefetched_search and prefetched_search.get("status") == "success":
+        print(f"\n🔍 Using prefetched search results: {prefetched_search.get('total_chars', 0)} chars")
+        search_results = prefetched_search
+        tools_used.append(TOOL_UNIFIED_SEARCH)
     
-    if plan.get("needs_search", False):
+    elif plan.get("needs_search", False):
         print(f"\n🔍 Performing search: {plan.get('search_query', user_input)}")
         
         try:
@@ -314,7 +351,7 @@ def process_learning_query(
                     max_chars_per_source=1500
                 )
                 signal.alarm(0)  # Cancel alarm on success
-                tools_used.append("unified_search")
+                tools_used.append(TOOL_UNIFIED_SEARCH)
                 
                 if search_results.get("status") == "success":
                     print(f"    Search completed: {search_results.get('total_chars', 0)} chars")
@@ -376,7 +413,7 @@ def process_learning_query(
             "plan": plan,
             "ocr_text": ocr_text,
             "search_performed": search_results is not None,
-            "turn_number": len(history_manager.history["turns"])
+            "turn_number": len(history_manager.turns)
         }
     }
     
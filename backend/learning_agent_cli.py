@@ -3,65 +3,82 @@ CLI Interface for Adaptive Learning Agent
 Interactive command-line interface for testing
 """
 
+import io
 import os
 import sys
+import asyncio
+import threading
+
+from prompt_toolkit import PromptSession
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.learning_agent import process_learning_query
-from backend.history_manager import HistoryManager
+# The agent, history and search modules are imported where they are used so
+# the banner appears before their dependencies finish loading
+
+# Separator lines, built once instead of on every print
+EQ70 = "=" * 70
+DASH70 = "─" * 70
+
+BANNER = f"""
+{EQ70}
+🎓 ADAPTIVE LEARNING AGENT - CLI
+{EQ70}
+Commands:
+  - Type your question to get help
+  - 'upload <path>' to process an image
+  - 'history' to view conversation history
+  - 'new' to start a new session
+  - 'sessions' to list all sessions
+  - 'load <session_id>' to load a previous session
+  - 'debug' to toggle debug mode
+  - 'exit' or 'quit' to exit
+{EQ70}
+
+"""
 
 
 def print_banner():
     """Print welcome banner"""
-    print("\n" + "=" * 70)
-    print("🎓 ADAPTIVE LEARNING AGENT - CLI")
-    print("=" * 70)
-    print("Commands:")
-    print("  - Type your question to get help")
-    print("  - 'upload <path>' to process an image")
-    print("  - 'history' to view conversation history")
-    print("  - 'new' to start a new session")
-    print("  - 'sessions' to list all sessions")
-    print("  - 'load <session_id>' to load a previous session")
-    print("  - 'debug' to toggle debug mode")
-    print("  - 'exit' or 'quit' to exit")
-    print("=" * 70 + "\n")
+    sys.stdout.write(BANNER)
 
 
 def print_response(result):
     """Print formatted response"""
-    print("\n" + "─" * 70)
-    print("📚 LEARNING RESPONSE")
-    print("─" * 70)
-    print(f"\n{result['response']}\n")
+    # Build the whole block in memory and write it in one call
+    out = io.StringIO()
+    print("\n" + DASH70, file=out)
+    print("📚 LEARNING RESPONSE", file=out)
+    print(DASH70, file=out)
+    print(f"\n{result['response']}\n", file=out)
     
     if result.get('test_snippet'):
-        print("─" * 70)
-        print("🧪 TEST YOUR UNDERSTANDING")
-        print("─" * 70)
-        print(f"\n{result['test_snippet']}\n")
+        print(DASH70, file=out)
+        print("🧪 TEST YOUR UNDERSTANDING", file=out)
+        print(DASH70, file=out)
+        print(f"\n{result['test_snippet']}\n", file=out)
     
     if result.get('key_concepts'):
-        print("─" * 70)
-        print("🔑 KEY CONCEPTS")
-        print("─" * 70)
+        print(DASH70, file=out)
+        print("🔑 KEY CONCEPTS", file=out)
+        print(DASH70, file=out)
         for concept in result['key_concepts']:
-            print(f"  • {concept}")
-        print()
+            print(f"  • {concept}", file=out)
+        print(file=out)
     
     if result.get('follow_up_suggestions'):
-        print("─" * 70)
-        print("💡 FOLLOW-UP SUGGESTIONS")
-        print("─" * 70)
+        print(DASH70, file=out)
+        print("💡 FOLLOW-UP SUGGESTIONS", file=out)
+        print(DASH70, file=out)
         for i, suggestion in enumerate(result['follow_up_suggestions'], 1):
-            print(f"  {i}. {suggestion}")
-        print()
+            print(f"  {i}. {suggestion}", file=out)
+        print(file=out)
     
-    print("─" * 70)
-    print(f"Confidence: {result.get('confidence', 0.0):.0%} | Session: {result.get('session_id', 'N/A')}")
-    print("─" * 70 + "\n")
+    print(DASH70, file=out)
+    print(f"Confidence: {result.get('confidence', 0.0):.0%} | Session: {result.get('session_id', 'N/A')}", file=out)
+    print(DASH70 + "\n", file=out)
+    sys.stdout.write(out.getvalue())
 
 
 def print_debug_info(result):
@@ -79,68 +96,196 @@ def print_debug_info(result):
         print(f"  - Action plan: {plan.get('action_plan', 'N/A')}")
         print(f"  - Reasoning: {plan.get('reasoning', 'N/A')}")
     
-    print("─" * 70 + "\n")
+    print(DASH70 + "\n")
 
 
 def show_history(session_id):
     """Show conversation history"""
-    manager = HistoryManager.load_session(session_id)
-    if not manager:
+    from backend.history_manager import HistoryManager
+    
+    # Only the summary row is read up front; turns are streamed below
+    summary = HistoryManager.get_summary(session_id)
+    if not summary:
         print(" Session not found")
         return
     
-    history = manager.get_full_history()
-    turns = history.get('turns', [])
-    
-    if not turns:
+    if not summary['num_turns']:
         print("📝 No conversation history yet")
         return
     
-    print("\n" + "=" * 70)
-    print(f"📜 CONVERSATION HISTORY - {session_id}")
-    print("=" * 70)
+    out = io.StringIO()
+    print("\n" + EQ70, file=out)
+    print(f"📜 CONVERSATION HISTORY - {session_id}", file=out)
+    print(EQ70, file=out)
     
-    for turn in turns:
-        print(f"\n[Turn {turn['turn_id']}] {turn['timestamp']}")
-        print(f"👤 User: {turn['user_input']}")
-        print(f"🤖 Agent: {turn['agent_response'][:200]}...")
-        if turn.get('metadata', {}).get('tools_used'):
-            print(f"   Tools: {', '.join(turn['metadata']['tools_used'])}")
+    for turn in HistoryManager.iter_turns(session_id):
+        print(f"\n[Turn {turn.turn_id}] {turn.timestamp}", file=out)
+        print(f"👤 User: {turn.user_input}", file=out)
+        print(f"🤖 Agent: {turn.agent_response[:200]}...", file=out)
+        if turn.metadata.get('tools_used'):
+            print(f"   Tools: {', '.join(turn.metadata['tools_used'])}", file=out)
     
-    print("\n" + "=" * 70 + "\n")
+    print("\n" + EQ70 + "\n", file=out)
+    sys.stdout.write(out.getvalue())
 
 
 def list_sessions():
     """List all available sessions"""
-    sessions = HistoryManager.list_sessions()
+    from backend.history_manager import HistoryManager
+    
+    sessions = HistoryManager.list_session_summaries(limit=10)  # Show last 10
     
     if not sessions:
         print("📝 No previous sessions found")
         return
     
-    print("\n" + "=" * 70)
-    print("📋 AVAILABLE SESSIONS")
-    print("=" * 70)
+    out = io.StringIO()
+    print("\n" + EQ70, file=out)
+    print("📋 AVAILABLE SESSIONS", file=out)
+    print(EQ70, file=out)
+    
+    for i, summary in enumerate(sessions, 1):
+        print(f"{i}. {summary['session_id']}", file=out)
+        print(f"   Created: {summary['created_at']} | Turns: {summary['num_turns']}", file=out)
+    
+    print(EQ70 + "\n", file=out)
+    sys.stdout.write(out.getvalue())
+
+
+def _prewarm():
+    """Load the embeddings model and the most recently used book index"""
+    try:
+        from backend.manage_books import INDEX_FOLDER, get_embeddings, load_index
+        
+        embeddings = get_embeddings()
+        
+        if os.path.isdir(INDEX_FOLDER):
+            with os.scandir(INDEX_FOLDER) as entries:
+                books = [entry for entry in entries if entry.is_dir()]
+            if books:
+                latest = max(books, key=lambda entry: entry.stat().st_mtime)
+                load_index(latest.name, embeddings)
+    except Exception:
+        # Warm-up is best effort; the first real query loads what it needs
+        pass
+
+
+def _run_in_daemon_thread(fn, *args):
+    """
+    Run fn in a daemon thread and return an awaitable for its result
+    
+    Unlike asyncio.to_thread, exiting the CLI never waits for the call:
+    asyncio.run only joins its default executor, and daemon threads are
+    abandoned at interpreter shutdown.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def deliver(setter, value):
+        # The waiting task may have been cancelled in the meantime
+        if not future.done():
+            setter(value)
+    
+    def work():
+        try:
+            setter, value = future.set_result, fn(*args)
+        except Exception as e:
+            setter, value = future.set_exception, e
+        try:
+            loop.call_soon_threadsafe(deliver, setter, value)
+        except RuntimeError:
+            # The event loop is closed: the CLI has already exited
+            pass
+    
+    threading.Thread(target=work, daemon=True).start()
+    return future
+
+
+async def prewarm_search(topic):
+    """
+    Fetch the Wikipedia summary for a predicted next topic
+    
+    The guess rarely matches the next question exactly, so only the cheap
+    Wikipedia lookup is prefetched, not the Groq query generation and
+    browser-based web search of a full unified_search.
+    
+    Returns:
+        unified_search-shaped result dict
+    """
+    from tools.unified_search import search_wikipedia
+    wiki_result = await _run_in_daemon_thread(search_wikipedia, topic, 1500)
     
-    for i, session_id in enumerate(sessions[:10], 1):  # Show last 10
-        manager = HistoryManager.load_session(session_id)
-        if manager:
-            history = manager.get_full_history()
-            num_turns = len(history.get('turns', []))
-            created = history.get('created_at', 'Unknown')
-            print(f"{i}. {session_id}")
-            print(f"   Created: {created} | Turns: {num_turns}")
+    if not wiki_result:
+        return {"status": "error", "web_search": None, "wikipedia_search": None,
+                "total_chars": 0, "message": "Prefetched Wikipedia search failed"}
     
-    print("=" * 70 + "\n")
+    return {
+        "status": "success",
+        "web_search": None,
+        "wikipedia_search": wiki_result,
+        "total_chars": len(wiki_result["content"]),
+        "message": "Search completed successfully (Wikipedia only)"
+    }
+
+
+def predict_next_topic(result):
+    """Guess the next question from the agent's first follow-up suggestion"""
+    suggestions = result.get('follow_up_suggestions') or []
+    return suggestions[0].strip() if suggestions else None
+
+
+async def take_prewarmed_search(prewarm, user_input):
+    """
+    Return the prewarmed search result if the new query matches its topic
+    
+    Args:
+        prewarm: (topic, task) tuple or None
+        user_input: Query the user just submitted
+        
+    Returns:
+        unified_search-shaped result dict, or None if there is no usable match
+    """
+    if not prewarm:
+        return None
+    
+    topic, task = prewarm
+    if user_input.strip().casefold() != topic.casefold():
+        # The worker thread finishes on its own; just drop the result
+        task.cancel()
+        return None
+    
+    try:
+        return await asyncio.wait_for(task, timeout=30)
+    except Exception as e:
+        print(f"   Prefetched search unavailable: {str(e)[:150]}")
+        return None
 
 
 def main():
     """Main CLI loop"""
+    asyncio.run(main_async())
+
+
+async def main_async():
+    """
+    Main CLI loop on an event loop
+    
+    While the user types the next question, a Wikipedia lookup for the
+    predicted follow-up topic runs in the background.
+    """
     print_banner()
     
+    # Load the embeddings model while the user reads the banner and types
+    threading.Thread(target=_prewarm, daemon=True).start()
+    
+    from backend.learning_agent import process_learning_query
+    from backend.history_manager import HistoryManager
+    
     # Initialize session
     current_session = None
     debug_mode = False
+    prompt_session = PromptSession()
+    prewarm = None  # (topic, task) for the speculative Wikipedia lookup
     
     print("🆕 Starting new session...")
     manager = HistoryManager()
@@ -150,7 +295,7 @@ def main():
     while True:
         try:
             # Get user input
-            user_input = input("You: ").strip()
+            user_input = (await prompt_session.prompt_async("You: ")).strip()
             
             if not user_input:
                 continue
@@ -201,7 +346,7 @@ def main():
                     continue
                 
                 print("\n🤖 Processing your image and question...")
-                follow_up = input("What would you like to know about this image? ").strip()
+                follow_up = (await prompt_session.prompt_async("What would you like to know about this image? ")).strip()
                 
                 result = process_learning_query(
                     user_input=follow_up or "Explain what you see in this image",
@@ -216,17 +361,26 @@ def main():
                 continue
             
             # Process regular query
+            prefetched_search = await take_prewarmed_search(prewarm, user_input)
+            prewarm = None
+            
             print("\n🤖 Thinking...")
             result = process_learning_query(
                 user_input=user_input,
-                session_id=current_session
+                session_id=current_session,
+                prefetched_search=prefetched_search
             )
             
             print_response(result)
             if debug_mode:
                 print_debug_info(result)
+            
+            # Look up the likely next topic while the user reads and types
+            next_topic = predict_next_topic(result)
+            if next_topic:
+                prewarm = (next_topic, asyncio.create_task(prewarm_search(next_topic)))
         
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             print("\n\nAsad Goodbye! Your session has been saved.")
             print(f"Session ID: {current_session}\n")
             break
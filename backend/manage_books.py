@@ -61,9 +61,16 @@
 #     indexer(embeddings, "ec2", "what is ec2?")
 
 import os
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_groq import ChatGroq  #  Groq LLM
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, TYPE_CHECKING
+
+# LangChain, Chroma and the embeddings stack are slow to import, so they are
+# loaded on first use instead of at module import
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from langchain_groq import ChatGroq  #  Groq LLM
 
 # Embeddings model
 # embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
@@ -78,8 +85,33 @@ load_dotenv()
 INDEX_FOLDER = "./chroma_index"  # root folder for embeddings
 GROQ_API_KEY = os.getenv("GROQ_API_KEY") #  direct key
 LLM_MODEL = "llama-3.3-70b-versatile"  # fast + good for RAG
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+RETRIEVAL_K = 4  # chunks passed to the LLM
+RETRIEVAL_FETCH_K = 16  # candidates considered by MMR
+MAX_CHUNK_CHARS = 1200  # per-chunk cap to keep prompt tokens down
 # ==================================
 
+# Warm handles reused across queries
+_DB_CACHE: Dict[str, "Chroma"] = {}
+_DB_CACHE_LOCK = threading.Lock()
+_LLM_SINGLETON: Optional["ChatGroq"] = None
+
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> "HuggingFaceEmbeddings":
+    """Load the embeddings model once per process."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+
+def _get_llm() -> "ChatGroq":
+    """Create the Groq client on first use and reuse it afterwards."""
+    global _LLM_SINGLETON
+    if _LLM_SINGLETON is None:
+        from langchain_groq import ChatGroq
+        _LLM_SINGLETON = ChatGroq(model=LLM_MODEL, groq_api_key=GROQ_API_KEY)
+    return _LLM_SINGLETON
+
 
 def normalize_book_name(book_name: str) -> str:
     """Remove .pdf extension (if present) and normalize spaces/underscores."""
@@ -89,21 +121,35 @@ def normalize_book_name(book_name: str) -> str:
 
 
 def load_index(book_name: str, embeddings):
-    """Load an existing Chroma index for a book, error if not found."""
+    """Load an existing Chroma index for a book (cached per book), error if not found."""
     normalized_name = normalize_book_name(book_name)
-    book_index_folder = os.path.join(INDEX_FOLDER, normalized_name)
 
-    if not os.path.exists(book_index_folder) or not os.listdir(book_index_folder):
-        raise FileNotFoundError(
-            f"No Chroma index found for '{book_name}' in {book_index_folder}. "
-            "Please create the index first."
-        )
+    db = _DB_CACHE.get(normalized_name)
+    if db is not None:
+        return db
 
-    print(f"Loading existing index for '{book_name}'...")
-    return Chroma(
-        persist_directory=book_index_folder,
-        embedding_function=embeddings
-    )
+    with _DB_CACHE_LOCK:
+        db = _DB_CACHE.get(normalized_name)
+        if db is not None:
+            return db
+
+        book_index_folder = os.path.join(INDEX_FOLDER, normalized_name)
+
+        if not os.path.exists(book_index_folder) or not os.listdir(book_index_folder):
+            raise FileNotFoundError(
+                f"No Chroma index found for '{book_name}' in {book_index_folder}. "
+                "Please create the index first."
+            )
+
+        from langchain_community.vectorstores import Chroma
+
+        print(f"Loading existing index for '{book_name}'...")
+        db = Chroma(
+            persist_directory=book_index_folder,
+            embedding_function=embeddings
+        )
+        _DB_CACHE[normalized_name] = db
+        return db
 
 
 def query_book_content(embeddings, book_name: str, query: str) -> str:
@@ -113,13 +159,16 @@ def query_book_content(embeddings, book_name: str, query: str) -> str:
     """
     try:
         db = load_index(book_name, embeddings)
-        results = db.similarity_search(query, k=8)  # retrieve top-3 chunks for richer context
+        # MMR picks diverse chunks from a wider candidate pool
+        results = db.max_marginal_relevance_search(
+            query, k=RETRIEVAL_K, fetch_k=RETRIEVAL_FETCH_K, lambda_mult=0.5
+        )
 
-        # Gather context
-        context = [res.page_content for res in results]
+        # Gather context as plain text rather than a list repr
+        context = "\n\n---\n\n".join(res.page_content[:MAX_CHUNK_CHARS] for res in results)
 
-        # Initialize Groq LLM
-        llm = ChatGroq(model=LLM_MODEL, groq_api_key=GROQ_API_KEY)
+        # Reuse the Groq LLM client
+        llm = _get_llm()
 
         # Prepare prompt for RAG
         rag_prompt = f"""
@@ -1,51 +1,107 @@
-# Placeholder query function for RAG implementation
-# This function will be called by the /query_book route
-# Replace this with your actual RAG query implementation
+# RAG query function used by the /query_book route and the agentic agent
+# Answers are cached in SQLite so repeated questions about a book skip
+# retrieval and the LLM call entirely
+
+import os
+import time
+import hashlib
+import sqlite3
+from contextlib import closing
+from typing import Optional
+
+from backend.manage_books import INDEX_FOLDER, get_embeddings, normalize_book_name, query_book_content
+
+# Cache database lives next to the Chroma indexes it caches
+RAG_CACHE_PATH = os.path.join(INDEX_FOLDER, "rag_cache.db")
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the cache database, creating the table if needed"""
+    os.makedirs(INDEX_FOLDER, exist_ok=True)
+    conn = sqlite3.connect(RAG_CACHE_PATH)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rag_cache (
+            book TEXT NOT NULL,
+            query_hash TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (book, query_hash)
+        )
+    ''')
+    return conn
+
+
+def _query_hash(query: str) -> str:
+    """Stable hash of a normalized query"""
+    normalized = " ".join(query.split()).casefold()
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+
+def _index_mtime(book: str) -> float:
+    """
+    Latest modification time in a book's index folder (0 if missing)
+
+    Chroma rewrites chroma.sqlite3 and segment files in place when a book is
+    re-indexed, which doesn't touch the folder's own mtime, so every file
+    under it is checked.
+    """
+    latest = 0.0
+    for root, _, files in os.walk(os.path.join(INDEX_FOLDER, book)):
+        for name in files:
+            try:
+                latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+            except OSError:
+                # Removed while walking, e.g. during a rebuild
+                pass
+    return latest
+
+
+def _get_cached_answer(book: str, query_hash: str) -> Optional[str]:
+    """Return a cached answer unless the book's index was rebuilt after it"""
+    with closing(_connect()) as conn:
+        row = conn.execute(
+            'SELECT answer, created_at FROM rag_cache WHERE book = ? AND query_hash = ?',
+            (book, query_hash)
+        ).fetchone()
+
+    if row and row[1] >= _index_mtime(book):
+        return row[0]
+    return None
+
+
+def _store_answer(book: str, query_hash: str, answer: str):
+    """Insert or replace a cached answer"""
+    with closing(_connect()) as conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO rag_cache (book, query_hash, answer, created_at) VALUES (?, ?, ?, ?)',
+            (book, query_hash, answer, time.time())
+        )
+        conn.commit()
+
 
 def query_book_rag(book_name: str, query: str) -> str:
     """
-    Placeholder function for RAG query implementation
-    
+    Answer a question about a book using its Chroma index and the Groq LLM
+
     Args:
         book_name: Name of the book to query
         query: User's question about the book
-        
+
     Returns:
         Response string from the RAG system
     """
-    # TODO: Implement actual RAG query functionality
-    # This should:
-    # 1. Load the Chroma index for the specified book
-    # 2. Perform similarity search with the query
-    # 3. Use a language model to generate a response based on retrieved chunks
-    # 4. Return the generated response
-    
-    # For now, return a placeholder response
-    return f"This is a placeholder response for query '{query}' on book '{book_name}'. The actual RAG query functionality will be implemented here."
-
-# Example of how to implement the actual RAG query:
-"""
-def query_book_rag(book_name: str, query: str) -> str:
-    from langchain_community.vectorstores import Chroma
-    from langchain_huggingface import HuggingFaceEmbeddings
-    
-    # Load the index
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    book_index_folder = f"./chroma_index/{book_name.replace(' ', '_')}"
-    
-    db = Chroma(
-        persist_directory=book_index_folder,
-        embedding_function=embeddings
-    )
-    
-    # Perform similarity search
-    results = db.similarity_search(query, k=3)
-    
-    # Combine retrieved chunks
-    context = "\n".join([doc.page_content for doc in results])
-    
-    # Use a language model to generate response
-    # (You'll need to implement this part with your preferred LLM)
-    
-    return response
-"""
+    book = normalize_book_name(book_name)
+    query_hash = _query_hash(query)
+
+    cached = _get_cached_answer(book, query_hash)
+    if cached is not None:
+        print(f" Using cached RAG answer for '{book_name}'")
+        return cached
+
+    answer = query_book_content(get_embeddings(), book_name, query)
+
+    # query_book_content reports failures as "Error: ..." strings; don't keep those
+    if not answer.startswith("Error:"):
+        _store_answer(book, query_hash, answer)
+
+    return answer
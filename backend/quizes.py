@@ -1,49 +1,159 @@
 # backend/quizes.py
 
 import os
+import re
+import io
 import sys
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import time
 import datetime
-from typing import Optional, Dict, Any, List
-from concurrent.futures import ThreadPoolExecutor # NEW: For concurrent grading
+import threading
+import orjson
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
-# Import unified search and Gemini
+# unified_search, tools.LLM_APIS and the Gemini SDK are imported on first
+# use to keep module import fast (tools.LLM_APIS loads the Gemini and Groq
+# SDKs at its own top level)
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from tools.unified_search import unified_search
-from google import genai
-from tools.LLM_APIS import GEMINI_API_KEY, GROQ_API_KEY
+
+
+@lru_cache(maxsize=1)
+def _api_keys() -> Tuple[Optional[str], Optional[str]]:
+    """(GEMINI_API_KEY, GROQ_API_KEY), loaded from tools.LLM_APIS on first use"""
+    from tools.LLM_APIS import GEMINI_API_KEY, GROQ_API_KEY
+    return GEMINI_API_KEY, GROQ_API_KEY
+
 
 # Ensure this is set in your environment
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 
-def generate_quiz(
+# Shared keep-alive session for Groq grading calls (avoids a TLS handshake per request)
+_GROQ_SESSION = requests.Session()
+_GROQ_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+))
+# The Authorization header is added per request once the key is loaded
+_GROQ_SESSION.headers.update({"Content-Type": "application/json"})
+
+# Background pool so unified search overlaps with quiz prompt preparation
+_SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+SEARCH_TIMEOUT = 30  # seconds; web scraping can be slow
+
+# Recent unified_search results keyed by normalized prompt
+SEARCH_CACHE_TTL = 3600  # seconds
+SEARCH_CACHE_MAXSIZE = 256
+_SEARCH_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_SEARCH_CACHE_LOCK = threading.Lock()
+
+QUIZ_MODEL = "models/gemini-2.5-flash"
+
+# Locates the start of the questions array in a (partial) quiz response
+_QUESTIONS_ARRAY_RE = re.compile(r'"questions"\s*:\s*\[')
+_JSON_DECODER = json.JSONDecoder()
+
+# Static grading instructions; only the answers to grade change per request,
+# so the provider can reuse this prefix across calls
+_GRADER_SYSTEM_PROMPT = """
+You are an impartial academic grader. Your task is to evaluate each student's answer based on the provided correct answer and question.
+
+# Input
+A JSON array with one object per answer to grade:
+  "id": answer id, "q": question, "a": correct/expected answer, "e": original explanation, "s": student's answer
+
+# Grading Rules
+1. **Strictness:** Be lenient. If the student captures the core concept, structure, or main keywords of the correct answer, mark it as **True**. Spelling or minor grammatical errors should be ignored.
+2. **Output:** You MUST respond with ONLY a single JSON array containing exactly one object per answer.
+
+# Output Schema
+[
+  {
+    "id": string (the id of the answer being graded),
+    "is_correct": boolean,
+    "llm_explanation": string (A 1-2 sentence tailored feedback on why the student was correct/incorrect, referencing the core concept.)
+  }
+]
+"""
+
+# Longer explanations are cut before being sent to the grader
+GRADER_MAX_EXPLANATION_CHARS = 500
+
+# Markdown code fence (```json ... ```) around an LLM JSON response
+_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+def _cached_unified_search(prompt: str) -> Dict[str, Any]:
+    """
+    Runs unified_search, reusing a successful result for the same prompt
+    from the last hour so regenerating a quiz skips the web round trip.
+    """
+    key = prompt.strip().lower()
+    now = time.monotonic()
+    
+    with _SEARCH_CACHE_LOCK:
+        cached = _SEARCH_CACHE.get(key)
+        if cached and now - cached[0] < SEARCH_CACHE_TTL:
+            print(f" Using cached search results for: {prompt}")
+            return cached[1]
+    
+    from tools.unified_search import unified_search
+    search_result = unified_search(prompt)
+    
+    if search_result.get('status') == 'success':
+        with _SEARCH_CACHE_LOCK:
+            _SEARCH_CACHE.pop(key, None)
+            _SEARCH_CACHE[key] = (now, search_result)
+            # Dicts keep insertion order, so the first key is the oldest
+            while len(_SEARCH_CACHE) > SEARCH_CACHE_MAXSIZE:
+                del _SEARCH_CACHE[next(iter(_SEARCH_CACHE))]
+    
+    return search_result
+
+def _prepare_quiz_request(
     prompt: str,
     num_questions: int,
     difficulty: str,
     mcq_percent: int,
-    rag_context: Optional[str] = None # Added for future RAG integration
-) -> Dict[str, Any]:
+    rag_context: Optional[str] = None
+):
     """
-    Calls the Groq LLM to generate a quiz based on user-defined parameters.
-    (This function remains the same as the previous version)
+    Gathers search context and builds the Gemini client and quiz prompt.
+    Returns a (client, contents) tuple.
     """
-    if not GROQ_API_KEY:
+    gemini_api_key, groq_api_key = _api_keys()
+    if not groq_api_key:
         raise ValueError("Missing GROQ_API_KEY environment variable")
 
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    # === Web Search Integration (ALWAYS) ===
+    # ALWAYS use unified search (compulsory); start it first so it runs
+    # while the rest of the request is prepared
+    print(f"🌐 Using unified search to gather information about: {prompt}")
+    search_future = _SEARCH_EXECUTOR.submit(_cached_unified_search, prompt)
+    
+    # Use Gemini API for quiz generation
+    if not gemini_api_key:
+        raise ValueError("Missing GEMINI_API_KEY")
+    
+    from google import genai
+    client = genai.Client(api_key=gemini_api_key)
     
     # Calculate question mix
     num_mcq = round(num_questions * (mcq_percent / 100))
     num_short_answer = num_questions - num_mcq
     
-    # === Web Search Integration (ALWAYS) ===
-    # ALWAYS use unified search (compulsory)
-    print(f"🌐 Using unified search to gather information about: {prompt}")
-    search_result = unified_search(prompt)
+    try:
+        search_result = search_future.result(timeout=SEARCH_TIMEOUT)
+    except FutureTimeoutError:
+        print(f" Unified search timed out after {SEARCH_TIMEOUT}s, continuing without it")
+        search_result = {}
+    except Exception as e:
+        print(f" Unified search failed: {e}")
+        search_result = {}
     
     search_context = []
     if search_result.get('status') == 'success':
@@ -115,30 +225,90 @@ def generate_quiz(
     Do not include any text before or after the JSON. Return only valid JSON.
     """
 
-    # Use Gemini API for quiz generation
-    if not GEMINI_API_KEY:
-        raise ValueError("Missing GEMINI_API_KEY")
+    return client, f"{system_prompt}\n\nGenerate a quiz for the topic: {prompt}"
+
+def _iter_streamed_questions(chunks: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Yields each question object from a streamed quiz response as soon as
+    its closing brace arrives. Text before the questions array (including
+    any markdown fence) is skipped.
+    """
+    buffer = ""
+    pos = None  # index of the next unread character inside the questions array
     
-    client = genai.Client(api_key=GEMINI_API_KEY)
-    response = client.models.generate_content(
-        model="models/gemini-2.5-flash",
-        contents=f"{system_prompt}\n\nGenerate a quiz for the topic: {prompt}",
+    for chunk in chunks:
+        buffer += chunk
+        
+        if pos is None:
+            match = _QUESTIONS_ARRAY_RE.search(buffer)
+            if not match:
+                continue
+            buffer = buffer[match.end():]
+            pos = 0
+        
+        while True:
+            # Skip separators between array items
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buffer) or buffer[pos] == ']':
+                break
+            try:
+                question, pos = _JSON_DECODER.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Object not complete yet, wait for more text
+            yield question
+        
+        # Drop consumed text so the buffer only holds the pending question
+        buffer = buffer[pos:]
+        pos = 0
+        if buffer.startswith(']'):
+            return
+
+def generate_quiz_stream(
+    prompt: str,
+    num_questions: int,
+    difficulty: str,
+    mcq_percent: int,
+    rag_context: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Streams quiz generation from Gemini, yielding each question dict as
+    soon as it has been fully generated.
+    """
+    client, contents = _prepare_quiz_request(
+        prompt, num_questions, difficulty, mcq_percent, rag_context
+    )
+    stream = client.models.generate_content_stream(model=QUIZ_MODEL, contents=contents)
+    yield from _iter_streamed_questions(chunk.text for chunk in stream if chunk.text)
+
+def generate_quiz(
+    prompt: str,
+    num_questions: int,
+    difficulty: str,
+    mcq_percent: int,
+    rag_context: Optional[str] = None # Added for future RAG integration
+) -> Dict[str, Any]:
+    """
+    Calls the Gemini LLM to generate a quiz based on user-defined parameters.
+    The response is streamed into a buffer and parsed once complete.
+    """
+    client, contents = _prepare_quiz_request(
+        prompt, num_questions, difficulty, mcq_percent, rag_context
     )
+    
+    buffer = io.StringIO()
+    for chunk in client.models.generate_content_stream(model=QUIZ_MODEL, contents=contents):
+        if chunk.text:
+            buffer.write(chunk.text)
 
     # Extract quiz JSON text
-    quiz_text = response.text.strip()
+    quiz_text = buffer.getvalue().strip()
     
     # Remove markdown code blocks if present
-    if quiz_text.startswith('```json'):
-        quiz_text = quiz_text[7:]
-    if quiz_text.startswith('```'):
-        quiz_text = quiz_text[3:]
-    if quiz_text.endswith('```'):
-        quiz_text = quiz_text[:-3]
-    quiz_text = quiz_text.strip()
+    quiz_text = _FENCE_RE.sub('', quiz_text).strip()
 
     try:
-        quiz_json = json.loads(quiz_text)
+        quiz_json = orjson.loads(quiz_text)
         # Ensure 'generated_at' is present for completeness
         if 'metadata' in quiz_json['quiz']:
             quiz_json['quiz']['metadata']['generated_at'] = datetime.datetime.now().isoformat()
@@ -151,104 +321,146 @@ def generate_quiz(
 # NEW GRADING IMPLEMENTATION
 # ----------------------------------------------------------------------
 
-def semantically_grade_short_answer(
-    question: str, 
-    user_answer: str, 
-    correct_answer: str, 
-    explanation: str
-) -> Dict[str, Any]:
+def semantically_grade_short_answers_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Calls the Groq LLM to semantically grade a short answer.
-    This is a synchronous, blocking function designed to be run in a thread.
+    Calls the Groq LLM once to semantically grade several short answers.
+    
+    Args:
+        items: Dicts with 'id', 'question', 'user_answer', 'correct_answer'
+            and 'explanation'
+    
+    Returns:
+        One dict per item, in the same order, with 'id', 'is_correct' and
+        'llm_explanation'
     """
-    if not GROQ_API_KEY:
+    if not items:
+        return []
+
+    _, groq_api_key = _api_keys()
+    if not groq_api_key:
         # In a real app, you might fall back to simple string matching here
         # or raise an error depending on your design.
-        return {'is_correct': False, 'llm_explanation': "Grading failed: Missing API Key."}
-
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
-
-    system_prompt = f"""
-    You are an impartial academic grader. Your task is to evaluate a student's answer based on the provided correct answer and question.
+        return [
+            {'id': item['id'], 'is_correct': False, 'llm_explanation': "Grading failed: Missing API Key."}
+            for item in items
+        ]
 
-    # Grading Rules
-    1. **Strictness:** Be lenient. If the student captures the core concept, structure, or main keywords of the correct answer, mark it as **True**. Spelling or minor grammatical errors should be ignored.
-    2. **Output:** You MUST respond with ONLY a single JSON object.
-    
-    # Context
-    Question: {question}
-    Correct/Expected Answer: {correct_answer}
-    Original Explanation: {explanation}
-    
-    # Output Schema
-    {{
-      "is_correct": boolean,
-      "llm_explanation": string (A 1-2 sentence tailored feedback on why the student was correct/incorrect, referencing the core concept.)
-    }}
-    """
+    answers = [
+        {
+            "id": str(item['id']),
+            "q": item['question'],
+            "a": item['correct_answer'],
+            "e": item['explanation'][:GRADER_MAX_EXPLANATION_CHARS],
+            "s": item['user_answer']
+        }
+        for item in items
+    ]
     
     payload = {
         "model": "llama-3.1-8b-instant",
         "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Student's Answer to Grade: {user_answer}"}
+            {"role": "system", "content": _GRADER_SYSTEM_PROMPT},
+            {"role": "user", "content": orjson.dumps(answers).decode()}
         ],
         "temperature": 0.3, # Use a low temp for reliable, deterministic grading
-        "max_tokens": 500
+        "max_tokens": 200 * len(items) + 100
     }
 
     try:
-        response = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=15)
+        response = _GROQ_SESSION.post(
+            GROQ_API_URL,
+            json=payload,
+            headers={"Authorization": f"Bearer {groq_api_key}"},
+            timeout=30
+        )
         response.raise_for_status()
-        data = response.json()
+        # Parse the raw body directly; only choices[0].message.content is used
+        data = orjson.loads(response.content)
         
         # Extract and parse the LLM's JSON response
         llm_text = data["choices"][0]["message"]["content"].strip()
         
         # Groq often wraps the JSON in markdown blocks, so we clean it up
-        if llm_text.startswith("```json"):
-            llm_text = llm_text[7:-3].strip()
+        llm_text = _FENCE_RE.sub('', llm_text).strip()
             
-        llm_result = json.loads(llm_text)
+        llm_results = orjson.loads(llm_text)
+        if isinstance(llm_results, dict):
+            llm_results = llm_results.get('results', [llm_results])
         
-        # Return the parsed result, ensuring the keys are present
-        return {
-            'is_correct': llm_result.get('is_correct', False),
-            'llm_explanation': llm_result.get('llm_explanation', "LLM failed to provide specific feedback.")
-        }
+        verdicts = {str(result.get('id')): result for result in llm_results if isinstance(result, dict)}
         
     except (requests.exceptions.RequestException, json.JSONDecodeError, KeyError, ValueError) as e:
         # Catch any errors (API down, timeout, invalid JSON) and fail safely
         print(f"Error during LLM grading: {e}")
-        return {
-            'is_correct': False,
-            'llm_explanation': f"An error occurred during automated grading ({type(e).__name__}). The expected answer was: {correct_answer}."
-        }
+        return [
+            {
+                'id': item['id'],
+                'is_correct': False,
+                'llm_explanation': f"An error occurred during automated grading ({type(e).__name__}). The expected answer was: {item['correct_answer']}."
+            }
+            for item in items
+        ]
+
+    # Return the parsed results in input order, ensuring the keys are present
+    graded = []
+    for item in items:
+        verdict = verdicts.get(str(item['id']), {})
+        graded.append({
+            'id': item['id'],
+            'is_correct': verdict.get('is_correct', False),
+            'llm_explanation': verdict.get('llm_explanation', "LLM failed to provide specific feedback.")
+        })
+    return graded
+
+def semantically_grade_short_answer(
+    question: str, 
+    user_answer: str, 
+    correct_answer: str, 
+    explanation: str
+) -> Dict[str, Any]:
+    """
+    Calls the Groq LLM to semantically grade a single short answer.
+    """
+    result = semantically_grade_short_answers_batch([{
+        'id': '1',
+        'question': question,
+        'user_answer': user_answer,
+        'correct_answer': correct_answer,
+        'explanation': explanation
+    }])[0]
+    return {'is_correct': result['is_correct'], 'llm_explanation': result['llm_explanation']}
 
 def grade_quiz(quiz_data: Dict[str, Any], user_answers: Dict[str, str]) -> Dict[str, Any]:
     """
     Compares user answers against the correct answers and generates feedback.
-    Uses concurrent threads for LLM-based semantic grading of short answers.
+    MCQs are graded locally; all answered short-answer questions are graded
+    together in a single LLM call.
     """
-    
-    def grade_single_question_task(q: Dict[str, Any], user_answer: str) -> Dict[str, Any]:
-        """Handles the grading logic for a single question."""
+    graded_results: List[Dict[str, Any]] = []
+    to_grade_remotely: List[Dict[str, Any]] = []
+
+    # 1. Grade everything that doesn't need the LLM, collect the rest
+    for q in quiz_data['quiz']['questions']:
         q_id = q['id']
         correct_answer = q['correct_answer'].strip()
-        explanation = q['explanation']
-        is_correct = False
-        final_explanation = explanation
-        
-        user_answer_stripped = user_answer.strip() 
+        # Pass the raw user answer from the dictionary
+        user_answer_stripped = user_answers.get(f"answer-{q_id}", "").strip()
 
         if q['type'] == 'mcq':
-            # Case-insensitive string comparison for MCQs
-            is_correct = (user_answer_stripped.lower() == correct_answer.lower())
-            
-        elif q['type'] == 'short_answer':
+            # Case-insensitive comparison for MCQs, graded locally
+            graded_results.append({
+                'id': q_id,
+                'is_correct': user_answer_stripped.casefold() == correct_answer.casefold(),
+                'user_answer': user_answer_stripped,
+                'correct_answer': correct_answer,
+                'explanation': q['explanation']
+            })
+            continue
+
+        is_correct = False
+        final_explanation = q['explanation']
+        
+        if q['type'] == 'short_answer':
             
             # === THE CRITICAL FIX IS HERE ===
             if not user_answer_stripped:
@@ -256,35 +468,34 @@ def grade_quiz(quiz_data: Dict[str, Any], user_answers: Dict[str, str]) -> Dict[
                 final_explanation = f"You did not provide an answer. The correct answer was: {correct_answer}. Please review the explanation."
             else:
                 # Proceed to LLM grading only if an answer was provided
-                llm_result = semantically_grade_short_answer(
-                    q['question'], user_answer_stripped, correct_answer, explanation
-                )
-                is_correct = llm_result.get('is_correct', False)
-                # Overwrite the simple explanation with the richer LLM feedback
-                final_explanation = llm_result['llm_explanation'] 
+                to_grade_remotely.append({
+                    'id': q_id,
+                    'question': q['question'],
+                    'user_answer': user_answer_stripped,
+                    'correct_answer': correct_answer,
+                    'explanation': q['explanation']
+                })
 
-        return {
+        graded_results.append({
             'id': q_id,
             'is_correct': is_correct,
             'user_answer': user_answer_stripped,
             'correct_answer': correct_answer,
             'explanation': final_explanation
-        }
+        })
 
-    # 1. Prepare data for concurrent execution
-    grading_tasks = []
-    for q in quiz_data['quiz']['questions']:
-        q_id = q['id']
-        # Pass the raw user answer from the dictionary
-        user_answer = user_answers.get(f"answer-{q_id}", "") 
-        # Add the function call arguments to a list for the executor
-        grading_tasks.append((q, user_answer))
-
-    # 2. Run grading tasks concurrently using a ThreadPoolExecutor
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        graded_results: List[Dict[str, Any]] = list(executor.map(
-            lambda args: grade_single_question_task(*args), grading_tasks
-        ))
+    # 2. Grade all answered short-answer questions in one LLM call
+    if to_grade_remotely:
+        llm_results = {
+            result['id']: result
+            for result in semantically_grade_short_answers_batch(to_grade_remotely)
+        }
+        for result in graded_results:
+            llm_result = llm_results.get(result['id'])
+            if llm_result:
+                result['is_correct'] = llm_result['is_correct']
+                # Overwrite the simple explanation with the richer LLM feedback
+                result['explanation'] = llm_result['llm_explanation']
     
     # 3. Calculate final score
     total_questions = len(graded_results)
@@ -297,6 +508,14 @@ def grade_quiz(quiz_data: Dict[str, Any], user_answers: Dict[str, str]) -> Dict[
         'percent': round((correct_count / total_questions) * 100) if total_questions > 0 else 0,
         'results': graded_results
     }
+
+def grade_quiz_bytes(quiz_data: Dict[str, Any], user_answers: Dict[str, str]) -> bytes:
+    """
+    Same as grade_quiz, but returns the result already serialized to JSON
+    bytes so the HTTP layer can send it without re-encoding.
+    """
+    return orjson.dumps(grade_quiz(quiz_data, user_answers))
+
 # ==================== TESTING ====================
 if __name__ == "__main__":
     import json
@@ -0,0 +1,110 @@
+"""
+In-memory LRU cache for loaded learning agent sessions
+Entries are validated against a cheap version token so repeated loads of
+an unchanged session skip the database read and row decoding
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+# Cache budget in megabytes
+SESSION_CACHE_MB = int(os.getenv("LEARNLY_SESSION_CACHE_MB", "64"))
+
+
+class SessionContentCache:
+    """LRU cache of parsed sessions with version-based invalidation"""
+
+    def __init__(self, max_bytes: int = SESSION_CACHE_MB * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            max_bytes: Approximate memory budget for cached entries
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Hashable, int, Any]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _lookup(self, key: str, version: Hashable):
+        """Return the cached value if its version matches, else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def get(
+        self,
+        key: str,
+        version: Hashable,
+        loader: Callable[[], Tuple[Any, int]]
+    ) -> Any:
+        """
+        Get a session, loading it on a miss
+
+        Concurrent misses for the same key are coalesced so the loader
+        runs once.
+
+        Args:
+            key: Session ID
+            version: Token that changes whenever the session changes
+            loader: Callable returning (value, approximate size in bytes)
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        value = self._lookup(key, version)
+        if value is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have loaded it while we waited
+            value = self._lookup(key, version)
+            if value is not None:
+                return value
+
+            value, size = loader()
+            self.put(key, version, value, size)
+            return value
+
+    def put(self, key: str, version: Hashable, value: Any, size: int):
+        """Store a value, evicting least recently used entries over budget"""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (version, size, value)
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+
+    def invalidate(self, key: str):
+        """Drop a single entry"""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+
+# Shared cache used by HistoryManager
+session_cache = SessionContentCache()
@@ -204,23 +204,36 @@
 
 import os
 import io
-import json
+import re
+import asyncio
+import queue
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import repeat
+from typing import List, NamedTuple, Optional, Tuple, Union
+import numpy as np
+from pydantic import BaseModel, ConfigDict
 from dotenv import load_dotenv
 # from langchain_core import embeddings
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+from reportlab.platypus import Paragraph
+from reportlab.pdfgen import canvas
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
-# LangChain / Groq imports
-from langchain_community.vectorstores import Chroma
-from sentence_transformers import SentenceTransformer
+# Book indexes are read with the native chromadb client
+import chromadb
 
 # Import unified search and Gemini
+# The project root (parent of tools/) is added once, only if it's missing
 import sys
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_TOOLS_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _TOOLS_PATH not in sys.path:
+    sys.path.insert(0, _TOOLS_PATH)
 from tools.unified_search import unified_search
 from google import genai
 from tools.LLM_APIS import GEMINI_API_KEY
@@ -228,6 +241,150 @@ from tools.LLM_APIS import GEMINI_API_KEY
 # Load environment variables
 load_dotenv()
 INDEX_FOLDER = "./chroma_index"
+# Collection name LangChain's Chroma wrapper uses when indexing books (rag_com/indexer.py)
+COLLECTION_NAME = "langchain"
+RAG_K = 12  # chunks passed to the LLM
+RAG_FETCH_K = 36  # candidates considered by MMR
+MMR_LAMBDA = 0.5  # 1.0 = pure relevance, 0.0 = pure diversity
+
+# Embed RAG queries with an int8-quantized ONNX Runtime copy of the
+# embeddings model (needs optimum[onnxruntime]; exported on first use)
+USE_ONNX_EMBEDDINGS = os.getenv("LEARNLY_ONNX_EMBEDDINGS", "0") == "1"
+ONNX_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_MODEL_DIR = "./onnx_models/all-MiniLM-L6-v2-int8"
+
+# Recently embedded RAG queries, keyed by (embeddings model, prompt)
+QUERY_EMBEDDING_CACHE_SIZE = 256
+_QUERY_EMBEDDING_CACHE: "OrderedDict[tuple, List[float]]" = OrderedDict()
+_QUERY_EMBEDDING_CACHE_LOCK = threading.Lock()
+
+# Start of the slides array in a streamed deck
+_SLIDES_ARRAY_RE = re.compile(r'"slides"\s*:\s*\[')
+
+# Template-based decks built straight from RAG chunks (no Gemini call)
+FAST_MODE_MIN_CONTEXT_CHARS = 2000  # less retrieved text than this falls back to Gemini
+FAST_MODE_SECTIONS = ["Introduction", "Background", "Key Concepts", "Examples", "Conclusion"]
+FAST_MODE_MAX_BULLET_CHARS = 200
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Render slides into a PDF while Gemini is still streaming the deck.
+# Off by default: most decks are never downloaded, and the per-slide render
+# plus merge is slower than the single canvas pass create_pdf_from_slides
+# does on the first download
+STREAM_PDF_PREBUILD = os.getenv("LEARNLY_STREAM_PDF", "0") == "1"
+
+
+# ----------------- Slide Deck Schema -----------------
+# Mirrors the JSON schema given to Gemini; validation and parsing happen
+# in one pass in pydantic-core. Gemini often returns numbers or nulls for
+# the string fields (e.g. "slide_id": 1), which json.loads used to accept,
+# so numbers are coerced to strings and the descriptive fields may be null
+class Slide(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    slide_id: Optional[str] = ""
+    slide_type: Optional[str] = "paragraph"  # title_slide | paragraph | unordered_list | ordered_list
+    slide_title: Optional[str] = ""
+    slide_content: Union[str, List[str], None] = None
+
+
+class SlideDeckMetadata(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    created_at: Optional[str] = ""
+    created_by: Optional[str] = ""
+    total_slides: Optional[int] = 0
+
+
+class SlideDeckBody(BaseModel):
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    title: str
+    topic: Optional[str] = ""
+    metadata: SlideDeckMetadata = SlideDeckMetadata()
+    slides: List[Slide]
+
+
+class SlideDeck(BaseModel):
+    slide_deck: SlideDeckBody
+
+
+# ----------------- Cached Handles -----------------
+@lru_cache(maxsize=1)
+def _get_genai_client():
+    """Create the Gemini client once per process."""
+    return genai.Client(api_key=GEMINI_API_KEY)
+
+
+@lru_cache(maxsize=1)
+def _get_embeddings():
+    """Embeddings model shared with manage_books, loaded once per process."""
+    from backend.manage_books import get_embeddings
+    return get_embeddings()
+
+
+class OnnxEmbeddings:
+    """
+    Sentence embeddings from an int8-quantized ONNX export of MiniLM.
+    Implements the LangChain Embeddings interface (embed_query /
+    embed_documents) with the same mean pooling and L2 normalization as
+    the sentence-transformers model.
+    """
+
+    QUANTIZED_FILE = "model_quantized.onnx"
+
+    def __init__(self, model_name: str = ONNX_EMBEDDING_MODEL, model_dir: str = ONNX_MODEL_DIR):
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        if not os.path.exists(os.path.join(model_dir, self.QUANTIZED_FILE)):
+            self._export(model_name, model_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(model_dir, file_name=self.QUANTIZED_FILE)
+
+    @classmethod
+    def _export(cls, model_name: str, model_dir: str):
+        """Export the model to ONNX and dynamically quantize it to int8 (one time)."""
+        from onnxruntime.quantization import QuantFormat, QuantizationMode
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import QuantizationConfig
+        from transformers import AutoTokenizer
+
+        print(f"Exporting {model_name} to int8 ONNX in {model_dir}...")
+        model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+        model.save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+
+        quantization_config = QuantizationConfig(
+            is_static=False,
+            format=QuantFormat.QOperator,
+            mode=QuantizationMode.IntegerOps,
+            per_channel=False
+        )
+        ORTQuantizer.from_pretrained(model).quantize(save_dir=model_dir, quantization_config=quantization_config)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of texts."""
+        inputs = self.tokenizer(texts, padding=True, truncation=True, return_tensors="np")
+        token_embeddings = np.asarray(self.model(**inputs).last_hidden_state)
+
+        # Mean pooling over real tokens, then unit-normalize
+        mask = inputs["attention_mask"][..., None].astype(token_embeddings.dtype)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query."""
+        return self.embed_documents([text])[0]
+
+
+@lru_cache(maxsize=1)
+def _get_onnx_embeddings() -> OnnxEmbeddings:
+    """Load the quantized ONNX embeddings once per process."""
+    return OnnxEmbeddings()
+
 
 # ----------------- Utility Functions -----------------
 def normalize_book_name(book_name: str) -> str:
@@ -237,23 +394,379 @@ def normalize_book_name(book_name: str) -> str:
     return book_name.replace(" ", "_")
 
 
-def load_index(embeddings, book_name: str):
-    """Load Chroma index for a book."""
-    normalized_name = normalize_book_name(book_name)
+def load_index(book_name: str):
+    """Load the Chroma collection for a book (cached per book)."""
+    return _load_native_collection(normalize_book_name(book_name))
+
+
+@lru_cache(maxsize=16)
+def _load_native_collection(normalized_name: str):
+    """Open a book's collection with the native chromadb client; failures are not cached."""
     index_folder = os.path.join(INDEX_FOLDER, normalized_name)
-    if not os.path.exists(index_folder) or not os.listdir(index_folder):
-        raise FileNotFoundError(f"No index found for book: {book_name}")
-    return Chroma(persist_directory=index_folder, embedding_function=embeddings)
+    # One scandir call checks both that the folder exists and that it isn't empty
+    try:
+        with os.scandir(index_folder) as entries:
+            has_entries = next(entries, None) is not None
+    except (FileNotFoundError, NotADirectoryError):
+        has_entries = False
+    if not has_entries:
+        raise FileNotFoundError(f"No index found for book: {normalized_name}")
+    collection = chromadb.PersistentClient(path=index_folder).get_collection(COLLECTION_NAME)
+    # HNSW settings are persisted with the collection when it is built
+    if "hnsw:search_ef" not in (collection.metadata or {}):
+        print(f" Index for '{normalized_name}' uses default HNSW settings; run rag_com/reindex.py to tune it")
+    return collection
+
+
+def _mmr_select(query_vec: np.ndarray, cand_matrix: np.ndarray, k: int, lambda_: float = MMR_LAMBDA) -> List[int]:
+    """
+    Maximal marginal relevance selection over candidate embeddings.
+    All pairwise similarities are computed up front with two matrix
+    products; the greedy loop only does vectorized updates.
+
+    Returns:
+        Indices of the selected candidates, in selection order
+    """
+    n = cand_matrix.shape[0]
+    if n == 0:
+        return []
+
+    # Cosine similarity via unit-normalized vectors
+    cand = cand_matrix / np.maximum(np.linalg.norm(cand_matrix, axis=1, keepdims=True), 1e-12)
+    query = query_vec / max(float(np.linalg.norm(query_vec)), 1e-12)
+    query_sims = cand @ query
+    pair_sims = cand @ cand.T
+
+    selected = []
+    available = np.ones(n, dtype=bool)
+    redundancy = np.zeros(n, dtype=np.float32)
+    for _ in range(min(k, n)):
+        scores = lambda_ * query_sims - (1 - lambda_) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, pair_sims[best], out=redundancy)
+    return selected
+
+
+def _embeddings_cache_key(embeddings) -> tuple:
+    """
+    Hashable identity of an embeddings model for the query cache. LangChain
+    embeddings are pydantic models and can't be hashed themselves, so the
+    class and model name are used, or the object's id if it has no name.
+    """
+    return (type(embeddings).__name__, getattr(embeddings, "model_name", None) or id(embeddings))
+
+
+def _embed_queries(embeddings, prompts: List[str]) -> List[List[float]]:
+    """
+    Embed RAG queries, reusing vectors for prompts seen recently. Prompts
+    not in the cache are embedded together in one batch, sorted by length
+    so similar-length prompts share a padded batch.
+    """
+    model_key = _embeddings_cache_key(embeddings)
+    vectors = [None] * len(prompts)
+    missing = []
+    with _QUERY_EMBEDDING_CACHE_LOCK:
+        for i, prompt in enumerate(prompts):
+            key = (model_key, prompt)
+            vector = _QUERY_EMBEDDING_CACHE.get(key)
+            if vector is None:
+                missing.append(i)
+            else:
+                _QUERY_EMBEDDING_CACHE.move_to_end(key)
+                vectors[i] = vector
+
+    if missing:
+        to_embed = sorted({prompts[i] for i in missing}, key=len)
+        fresh = dict(zip(to_embed, embeddings.embed_documents(to_embed)))
+        with _QUERY_EMBEDDING_CACHE_LOCK:
+            for prompt, vector in fresh.items():
+                _QUERY_EMBEDDING_CACHE[(model_key, prompt)] = vector
+            while len(_QUERY_EMBEDDING_CACHE) > QUERY_EMBEDDING_CACHE_SIZE:
+                _QUERY_EMBEDDING_CACHE.popitem(last=False)
+        for i in missing:
+            vectors[i] = fresh[prompts[i]]
+
+    return vectors
 
 
 # ----------------- Slide Deck Generation -----------------
-def generate_slide_deck(embeddings, title: str, prompt: str, use_rag: bool, book_name: str):
+def _retrieve_rag_chunks_batched(embeddings, book_name: str, prompts: List[str], k: int = RAG_K) -> List[List[str]]:
+    """
+    Similarity search for several prompts at once: the prompts are embedded
+    in one batch (or taken from the query embedding cache) and the vectors
+    are sent to Chroma in a single query. Each prompt's
+    candidates are then diversified with MMR.
+
+    Returns:
+        One list of chunk texts per prompt, in input order
+    """
+    if USE_ONNX_EMBEDDINGS:
+        embeddings = _get_onnx_embeddings()
+    elif embeddings is None:
+        embeddings = _get_embeddings()
+    collection = load_index(book_name)
+
+    vectors = _embed_queries(embeddings, prompts)
+
+    results = collection.query(
+        query_embeddings=vectors,
+        n_results=max(k, RAG_FETCH_K),
+        include=["documents", "embeddings"]
+    )
+
+    chunks = []
+    for vector, documents, candidates in zip(vectors, results["documents"], results["embeddings"]):
+        if not documents:
+            chunks.append([])
+            continue
+        cand_matrix = np.asarray(candidates, dtype=np.float32).reshape(len(documents), -1)
+        picked = _mmr_select(np.asarray(vector, dtype=np.float32), cand_matrix, k)
+        chunks.append([documents[i] for i in picked])
+    return chunks
+
+
+def _retrieve_rag_chunks(embeddings, book_name: str, prompt: str) -> List[str]:
+    """Similarity search over a book's index, returning chunk texts."""
+    return _retrieve_rag_chunks_batched(embeddings, book_name, [prompt])[0]
+
+
+def _strip_code_fence(text: str) -> str:
+    """Strip a leading ```json / ``` fence and a trailing ``` fence."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.removeprefix("```")
+        if text[:4].lower() == "json":
+            text = text[4:]
+    return text.removesuffix("```").strip()
+
+
+class _SlideStreamParser:
+    """
+    Incremental parser for a streamed slide deck JSON. Each complete object
+    in the "slides" array is validated as a Slide as soon as its closing
+    brace arrives.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = None  # scan position inside the slides array
+        self._depth = 0
+        self._start = 0
+        self._in_string = False
+        self._escape = False
+        self._done = False
+
+    def feed(self, chunk: str) -> List[Slide]:
+        """Add a chunk of streamed text and return the slides it completed."""
+        self.text += chunk
+        slides = []
+        if self._done:
+            return slides
+
+        if self._pos is None:
+            match = _SLIDES_ARRAY_RE.search(self.text)
+            if not match:
+                return slides
+            self._pos = match.end()
+
+        text = self.text
+        i = self._pos
+        while i < len(text):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        slides.append(Slide.model_validate_json(text[self._start:i + 1]))
+                    except ValueError:
+                        pass  # the final parse of the full text decides
+            elif ch == "]" and self._depth == 0:
+                self._done = True
+                break
+            i += 1
+        self._pos = i
+        return slides
+
+
+def _stream_slide_deck(client, final_prompt: str):
+    """
+    Stream the deck from Gemini and render each slide as soon as it is
+    complete, on a consumer thread, while the rest is still generating.
+
+    Returns:
+        (raw_text, streamed_slides, slide_pdfs) - the full response text,
+        the slides parsed while streaming and their PDFs in order; the last
+        two are None if rendering failed
+    """
+    parser = _SlideStreamParser()
+    pending = queue.Queue()
+    streamed_slides = []
+    slide_pdfs = []
+    render_error = []
+
+    def render_worker():
+        while (slide := pending.get()) is not None:
+            if render_error:
+                continue
+            try:
+                slide_pdfs.append(_render_single_slide(slide))
+            except Exception as e:
+                render_error.append(e)
+
+    renderer = threading.Thread(target=render_worker, daemon=True)
+    renderer.start()
+    try:
+        for chunk in client.models.generate_content_stream(
+            model="models/gemini-2.5-flash",
+            contents=final_prompt,
+        ):
+            for slide in parser.feed(chunk.text or ""):
+                streamed_slides.append(slide)
+                pending.put(slide)
+    finally:
+        pending.put(None)
+        renderer.join()
+
+    if render_error:
+        print(f" Streaming PDF render failed: {render_error[0]}")
+        return parser.text, None, None
+    return parser.text, streamed_slides, slide_pdfs
+
+
+async def _no_rag_chunks():
+    """Placeholder awaitable when RAG is not requested."""
+    return None
+
+
+def _first_sentence(text: str, max_chars: int = FAST_MODE_MAX_BULLET_CHARS) -> str:
+    """First sentence of a chunk, cut at a word boundary if it is too long."""
+    sentence = _SENTENCE_END_RE.split(text, maxsplit=1)[0]
+    if len(sentence) > max_chars:
+        sentence = sentence[:max_chars].rsplit(" ", 1)[0] + "..."
+    return sentence
+
+
+def generate_slide_deck_fast(title: str, prompt: str, rag_chunks: Optional[List[str]]):
+    """
+    Build a slide deck from retrieved book chunks with a fixed template
+    (Introduction, Background, Key Concepts, Examples, Conclusion) instead
+    of calling Gemini. The first sentence of each chunk becomes a bullet.
+
+    Args:
+        title: Presentation title
+        prompt: Topic/description of the deck
+        rag_chunks: Chunk texts retrieved from the book's index
+
+    Returns:
+        Slide deck JSON dict, or None if there isn't enough context
+    """
+    chunks = [" ".join(chunk.split()) for chunk in rag_chunks or []]
+    chunks = [chunk for chunk in chunks if chunk]
+    if sum(map(len, chunks)) < FAST_MODE_MIN_CONTEXT_CHARS or len(chunks) < len(FAST_MODE_SECTIONS):
+        return None
+
+    # Split the chunks (already in relevance order) into one group per section
+    per_section, extra = divmod(len(chunks), len(FAST_MODE_SECTIONS))
+    slides = []
+    start = 0
+    for i, section in enumerate(FAST_MODE_SECTIONS):
+        end = start + per_section + (1 if i < extra else 0)
+        group = chunks[start:end]
+        start = end
+
+        if i == 0:
+            slides.append(Slide(
+                slide_id=str(i + 1),
+                slide_type="paragraph",
+                slide_title=f"{section}: {prompt}",
+                slide_content=" ".join(_first_sentence(chunk) for chunk in group)
+            ))
+        else:
+            slides.append(Slide(
+                slide_id=str(i + 1),
+                slide_type="unordered_list",
+                slide_title=section,
+                slide_content=[_first_sentence(chunk) for chunk in group]
+            ))
+
+    slide_deck = SlideDeck(slide_deck=SlideDeckBody(
+        title=title,
+        topic=prompt,
+        metadata=SlideDeckMetadata(
+            created_at=datetime.now().isoformat(),
+            created_by="Learnly fast mode",
+            total_slides=len(slides)
+        ),
+        slides=slides
+    ))
+    return slide_deck.model_dump()
+
+
+def generate_slide_deck(embeddings, title: str, prompt: str, use_rag: bool, book_name: str, fast_mode: bool = False):
+    """
+    Synchronous wrapper around generate_slide_deck_async. With fast_mode
+    and a book, a templated deck is built from the RAG chunks when there is
+    enough context, skipping the Gemini call and web search entirely.
+    """
+    rag_context = None
+    if fast_mode and use_rag and book_name:
+        rag_context = _retrieve_rag_chunks(embeddings, book_name, prompt)
+        slide_deck = generate_slide_deck_fast(title, prompt, rag_context)
+        if slide_deck is not None:
+            print(f" Fast mode: built {len(slide_deck['slide_deck']['slides'])} slides from RAG context")
+            return slide_deck
+        print(" Fast mode: not enough RAG context, using Gemini")
+
+    return asyncio.run(generate_slide_deck_async(embeddings, title, prompt, use_rag, book_name, rag_context=rag_context))
+
+
+async def generate_slide_deck_async(
+    embeddings,
+    title: str,
+    prompt: str,
+    use_rag: bool,
+    book_name: str,
+    rag_context: Optional[List[str]] = None
+):
+    """
+    Generate a slide deck JSON. Unified search and RAG retrieval are
+    independent, so they run concurrently in worker threads.
+    A precomputed rag_context skips the RAG lookup.
+    """
     if not GEMINI_API_KEY:
         raise ValueError("Missing GEMINI_API_KEY")
 
     # ALWAYS use unified search (compulsory)
     print(f"🌐 Using unified search to gather information about: {prompt}")
-    search_result = unified_search(prompt)
+    # Additionally use RAG if available
+    if rag_context is not None:
+        rag_task = asyncio.sleep(0, result=rag_context)
+    elif use_rag and book_name:
+        print(f"📚 Also retrieving from RAG index: {book_name}")
+        rag_task = asyncio.to_thread(_retrieve_rag_chunks, embeddings, book_name, prompt)
+    else:
+        rag_task = _no_rag_chunks()
+
+    search_result, rag_context = await asyncio.gather(
+        asyncio.to_thread(unified_search, prompt),
+        rag_task
+    )
     
     context = []
     if search_result.get('status') == 'success':
@@ -267,12 +780,7 @@ def generate_slide_deck(embeddings, title: str, prompt: str, use_rag: bool, book
         
         print(f" Retrieved {len(context)} sources from unified search")
     
-    # Additionally use RAG if available
-    if use_rag and book_name:
-        print(f"📚 Also retrieving from RAG index: {book_name}")
-        db = load_index(embeddings, book_name)
-        results = db.similarity_search(prompt, k=12)
-        rag_context = [r.page_content for r in results]
+    if rag_context is not None:
         context.extend(rag_context)
         print(f" Added {len(rag_context)} chunks from RAG\n")
 
@@ -310,119 +818,296 @@ Return output as valid JSON in this exact schema:
 """
 
     # Use Gemini API
-    client = genai.Client(api_key=GEMINI_API_KEY)
-    response = client.models.generate_content(
-        model="models/gemini-2.5-flash",
-        contents=final_prompt,
-    )
-
-    # Convert response to string
-    raw_text = response.text.strip()
+    # The cached client outlives each asyncio.run loop, so the blocking call
+    # runs in a thread rather than through the loop-bound aio client
+    client = _get_genai_client()
+    streamed_slides = slide_pdfs = None
+    if STREAM_PDF_PREBUILD:
+        raw_text, streamed_slides, slide_pdfs = await asyncio.to_thread(_stream_slide_deck, client, final_prompt)
+    else:
+        response = await asyncio.to_thread(
+            client.models.generate_content,
+            model="models/gemini-2.5-flash",
+            contents=final_prompt,
+        )
+        raw_text = response.text
 
     # Remove ```json or ``` code fences if present
-    if raw_text.startswith("```"):
-        lines = raw_text.splitlines()
-        if lines[0].startswith("```"):
-            lines = lines[1:]  # remove first ```json line
-        if lines[-1].strip() == "```":
-            lines = lines[:-1]  # remove last ``` line
-        raw_text = "\n".join(lines).strip()
-
-    # Parse JSON
+    raw_text = _strip_code_fence(raw_text)
+
+    # Parse and validate JSON (pydantic's ValidationError is a ValueError)
     try:
-        slide_deck_json = json.loads(raw_text)
-    except json.JSONDecodeError as e:
+        slide_deck = SlideDeck.model_validate_json(raw_text)
+    except ValueError as e:
         raise ValueError(f"LLM returned invalid JSON:\n{raw_text}\nOriginal error: {str(e)}")
 
-    return slide_deck_json
+    # Keep the streamed PDF only if it was rendered from exactly these slides
+    if slide_pdfs is not None:
+        try:
+            deck = slide_deck.slide_deck
+            if streamed_slides == deck.slides:
+                _store_prebuilt_pdf(slide_deck, _merge_slide_pdfs(deck.title, slide_pdfs).getvalue())
+        except Exception as e:
+            print(f" Could not keep streamed PDF: {e}")
+
+    return slide_deck.model_dump()
 
 
 # ----------------- PDF Generation -----------------
-def create_pdf_from_slides(slide_deck_data):
-    """Generate a PDF from slide deck JSON with 16:9 aspect ratio"""
-    width, height = 612, 612 * 9 / 16
-    pagesize = (width, height)
+# 16:9 slide page, its margin and the inner padding of the text frame
+SLIDE_WIDTH, SLIDE_HEIGHT = 612, 612 * 9 / 16
+SLIDE_PAGESIZE = (SLIDE_WIDTH, SLIDE_HEIGHT)
+SLIDE_MARGIN = 30
+SLIDE_PADDING = 6
+
+SLIDE_LEFT = SLIDE_MARGIN + SLIDE_PADDING
+SLIDE_BOTTOM = SLIDE_MARGIN + SLIDE_PADDING
+SLIDE_TOP = SLIDE_HEIGHT - SLIDE_MARGIN - SLIDE_PADDING
+SLIDE_FRAME_WIDTH = SLIDE_WIDTH - 2 * SLIDE_LEFT
+
+# Decks at least this long are rendered slide-by-slide in worker processes
+# and merged with pypdf (0 disables). The merge itself is serial and costs
+# about as much as drawing a short slide, so this only pays off for
+# text-heavy decks on machines with several cores.
+PARALLEL_PDF_MIN_SLIDES = int(os.getenv("LEARNLY_PARALLEL_PDF_MIN_SLIDES", "0"))
+
+_PDF_EXECUTOR = None
+_PDF_EXECUTOR_LOCK = threading.Lock()
+
+# PDFs rendered during streaming generation, keyed by the deck's content
+PREBUILT_PDF_CACHE_SIZE = 16
+_PREBUILT_PDFS = OrderedDict()
+_PREBUILT_PDFS_LOCK = threading.Lock()
+
+
+# Slide colors and paragraph styles, built once at import
+_TITLE_COLOR = colors.HexColor("#9f3dff")
+_HEADING_COLOR = colors.HexColor("#333333")
+_CONTENT_COLOR = colors.HexColor("#666666")
+
+_STYLES = getSampleStyleSheet()
+_TITLE_STYLE = ParagraphStyle(
+    "CustomTitle", parent=_STYLES["Title"], fontSize=60, leading=50,
+    alignment=TA_CENTER, spaceAfter=0, textColor=_TITLE_COLOR
+)
+_HEADING_STYLE = ParagraphStyle(
+    "CustomHeading", parent=_STYLES["Heading1"], fontSize=30, leading=34,
+    alignment=TA_CENTER, spaceAfter=15, textColor=_HEADING_COLOR
+)
+_CONTENT_STYLE = ParagraphStyle(
+    "CustomContent", parent=_STYLES["Normal"], fontSize=20,
+    alignment=TA_LEFT, spaceAfter=12, leading=24, textColor=_CONTENT_COLOR
+)
+_LIST_STYLE = ParagraphStyle(
+    "ListStyle", parent=_CONTENT_STYLE, leftIndent=30,
+    spaceAfter=10, leading=24, bulletIndent=15, spaceBefore=5
+)
+
+
+def _new_slide_canvas(buffer):
+    """
+    Canvas for a 16:9 slide PDF written to buffer. Canvases are single-use
+    (save() finalizes the document), so this is a factory rather than a pool.
+    """
+    return canvas.Canvas(buffer, pagesize=SLIDE_PAGESIZE)
+
+
+def _draw_paragraph(c, paragraph, y):
+    """Draw a paragraph with its top edge at y and return the y below it."""
+    _, h = paragraph.wrap(SLIDE_FRAME_WIDTH, SLIDE_HEIGHT)
+    if y - h < SLIDE_BOTTOM and y < SLIDE_TOP:
+        # Content overflowing the slide continues on a new page
+        c.showPage()
+        y = SLIDE_TOP
+    paragraph.drawOn(c, SLIDE_LEFT, y - h)
+    return y - h
+
+
+def _draw_title_slide(c, title):
+    """Draw the opening slide, which holds only the deck title."""
+    _draw_paragraph(c, Paragraph(title, _TITLE_STYLE), SLIDE_TOP - SLIDE_HEIGHT / 3)
+    c.showPage()
+
+
+class PreparedSlide(NamedTuple):
+    """A content slide with all of its Paragraphs already built."""
+    title: Paragraph
+    body: List[Tuple[Paragraph, float, float]]  # (paragraph, space before, space after)
+
+
+# Gap between the slide heading and its body
+_APPROX_TITLE_HEIGHT = 50
+_BODY_OFFSET = _HEADING_STYLE.spaceAfter + (SLIDE_HEIGHT - _APPROX_TITLE_HEIGHT - 60) / 4
+
+# Vertical gaps after body text and list items
+_CONTENT_GAP = _CONTENT_STYLE.spaceAfter + 10
+_LIST_GAP = _LIST_STYLE.spaceAfter + 5
+
+_BULLET = "• "
+
+
+def _prepare_slide(slide: Slide) -> PreparedSlide:
+    """Split and strip a slide's content and build its Paragraphs."""
+    title = Paragraph((slide.slide_title or "").strip() or "(No Title)", _HEADING_STYLE)
+
+    content = slide.slide_content
+    if isinstance(content, str):
+        paragraphs = list(filter(None, map(str.strip, content.split("\n\n")))) or ["(No content)"]
+        body = [(Paragraph(para, _CONTENT_STYLE), 0, _CONTENT_GAP) for para in paragraphs]
+    elif isinstance(content, list):
+        items = list(filter(None, map(str.strip, content))) or ["(No content)"]
+        if slide.slide_type == "unordered_list":
+            prefixes = repeat(_BULLET)
+        else:
+            prefixes = (f"{i}. " for i in range(1, len(items) + 1))
+        body = [
+            (Paragraph(prefix + item, _LIST_STYLE), _LIST_STYLE.spaceBefore, _LIST_GAP)
+            for prefix, item in zip(prefixes, items)
+        ]
+    else:
+        body = [(Paragraph("(Invalid content)", _CONTENT_STYLE), 0, 0)]
+
+    return PreparedSlide(title, body)
+
+
+def _preprocess_slides(slides: List[Slide]) -> List[PreparedSlide]:
+    """Prepare every content slide before any drawing starts."""
+    return [_prepare_slide(slide) for slide in slides]
 
+
+def _draw_content_slide(c, prepared: PreparedSlide):
+    """Draw one prepared content slide (one or more pages if it overflows)."""
+    y = _draw_paragraph(c, prepared.title, SLIDE_TOP) - _BODY_OFFSET
+    for paragraph, space_before, space_after in prepared.body:
+        y = _draw_paragraph(c, paragraph, y - space_before) - space_after
+    c.showPage()
+
+
+def _render_single_slide(slide: Slide) -> bytes:
+    """Render one content slide to a standalone PDF (runs in a worker process)."""
     buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=pagesize,
-        rightMargin=30,
-        leftMargin=30,
-        topMargin=30,
-        bottomMargin=30
-    )
+    c = _new_slide_canvas(buffer)
+    _draw_content_slide(c, _prepare_slide(slide))
+    c.save()
+    return buffer.getvalue()
 
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        "CustomTitle", parent=styles["Title"], fontSize=60, leading=50,
-        alignment=TA_CENTER, spaceAfter=0, textColor=colors.HexColor("#9f3dff")
-    )
-    heading_style = ParagraphStyle(
-        "CustomHeading", parent=styles["Heading1"], fontSize=30, leading=34,
-        alignment=TA_CENTER, spaceAfter=15, textColor=colors.HexColor("#333333")
-    )
-    content_style = ParagraphStyle(
-        "CustomContent", parent=styles["Normal"], fontSize=20,
-        alignment=TA_LEFT, spaceAfter=12, leading=24, textColor=colors.HexColor("#666666")
-    )
-    list_style = ParagraphStyle(
-        "ListStyle", parent=content_style, leftIndent=30,
-        spaceAfter=10, leading=24, bulletIndent=15, spaceBefore=5
-    )
 
-    story = []
+def _get_pdf_executor() -> ProcessPoolExecutor:
+    """Create the slide rendering process pool on first use."""
+    global _PDF_EXECUTOR
+    with _PDF_EXECUTOR_LOCK:
+        if _PDF_EXECUTOR is None:
+            _PDF_EXECUTOR = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return _PDF_EXECUTOR
+
+
+def _merge_slide_pdfs(title, slide_pdfs) -> io.BytesIO:
+    """Render the title slide and merge it with per-slide PDFs using pypdf."""
+    from pypdf import PdfWriter
+
+    buffer = io.BytesIO()
+    c = _new_slide_canvas(buffer)
+    _draw_title_slide(c, title)
+    c.save()
+
+    writer = PdfWriter()
+    writer.append(io.BytesIO(buffer.getvalue()))
+    for slide_pdf in slide_pdfs:
+        writer.append(io.BytesIO(slide_pdf))
+
+    out = io.BytesIO()
+    writer.write(out)
+    out.seek(0)
+    return out
+
+
+def _create_pdf_parallel(title, slides) -> io.BytesIO:
+    """Render slides in worker processes and merge the pages with pypdf."""
+    chunksize = max(1, len(slides) // (4 * (os.cpu_count() or 1)))
+    return _merge_slide_pdfs(title, _get_pdf_executor().map(_render_single_slide, slides, chunksize=chunksize))
+
+
+def _deck_key(slide_deck: SlideDeck) -> str:
+    """Content hash of a validated slide deck."""
+    return hashlib.blake2b(slide_deck.model_dump_json().encode(), digest_size=16).hexdigest()
+
+
+def _store_prebuilt_pdf(slide_deck: SlideDeck, pdf_bytes: bytes):
+    """Remember a PDF rendered during generation for a later download."""
+    key = _deck_key(slide_deck)
+    with _PREBUILT_PDFS_LOCK:
+        _PREBUILT_PDFS[key] = pdf_bytes
+        _PREBUILT_PDFS.move_to_end(key)
+        while len(_PREBUILT_PDFS) > PREBUILT_PDF_CACHE_SIZE:
+            _PREBUILT_PDFS.popitem(last=False)
+
+
+def _get_prebuilt_pdf(slide_deck: SlideDeck) -> Optional[bytes]:
+    """PDF rendered while this exact deck was streaming, if any."""
+    if not _PREBUILT_PDFS:
+        return None
+    key = _deck_key(slide_deck)
+    with _PREBUILT_PDFS_LOCK:
+        return _PREBUILT_PDFS.get(key)
+
+
+def create_pdf_from_slides(slide_deck_data: Union[SlideDeck, dict]) -> io.BytesIO:
+    """
+    Generate a PDF from slide deck JSON with 16:9 aspect ratio.
+    Paragraphs are drawn directly onto a canvas at computed positions
+    instead of going through the Platypus layout engine. Very long decks
+    can be rendered slide-by-slide in parallel (see PARALLEL_PDF_MIN_SLIDES).
+    A deck that was generated with streaming already has its PDF rendered.
+
+    Args:
+        slide_deck_data: SlideDeck model or the equivalent JSON dict
+
+    Returns:
+        BytesIO positioned at the start of the PDF, ready to be streamed
+        without copying its contents into a separate bytes object
+    """
+    if isinstance(slide_deck_data, SlideDeck):
+        slide_deck = slide_deck_data
+    else:
+        slide_deck = SlideDeck.model_validate(slide_deck_data)
+
+    prebuilt = _get_prebuilt_pdf(slide_deck)
+    if prebuilt is not None:
+        # BytesIO shares the cached bytes until something writes to it
+        return io.BytesIO(prebuilt)
+
+    title = slide_deck.slide_deck.title
+    slides = slide_deck.slide_deck.slides
+
+    if PARALLEL_PDF_MIN_SLIDES and len(slides) >= PARALLEL_PDF_MIN_SLIDES and (os.cpu_count() or 1) > 1:
+        return _create_pdf_parallel(title, slides)
+
+    buffer = io.BytesIO()
+    c = _new_slide_canvas(buffer)
 
     # First slide: only title
-    title = slide_deck_data["slide_deck"]["title"]
-    story.append(Spacer(1, height / 3))
-    story.append(Paragraph(title, title_style))
-    story.append(PageBreak())
+    _draw_title_slide(c, title)
 
     # Content slides
-    slides = slide_deck_data["slide_deck"]["slides"]
-    for idx, slide in enumerate(slides):
-        slide_title = slide.get("slide_title", "")
-        story.append(Paragraph(slide_title.strip() or "(No Title)", heading_style))
-
-        approx_title_height = 50
-        remaining_height = height - approx_title_height - 60
-        story.append(Spacer(1, remaining_height / 4))
-
-        content = slide.get("slide_content")
-        if isinstance(content, str):
-            paragraphs = [p.strip() for p in content.split("\n\n") if p.strip()] or ["(No content)"]
-            for para in paragraphs:
-                story.append(Paragraph(para, content_style))
-                story.append(Spacer(1, 10))
-        elif isinstance(content, list):
-            content_items = [item.strip() for item in content if item.strip()] or ["(No content)"]
-            for i, item in enumerate(content_items):
-                bullet = f"• {item}" if slide["slide_type"] == "unordered_list" else f"{i+1}. {item}"
-                story.append(Paragraph(bullet, list_style))
-                story.append(Spacer(1, 5))
-        else:
-            story.append(Paragraph("(Invalid content)", content_style))
-
-        if idx < len(slides) - 1:
-            story.append(PageBreak())
+    for prepared in _preprocess_slides(slides):
+        _draw_content_slide(c, prepared)
 
-    doc.build(story)
-    pdf_bytes = buffer.getvalue()
-    buffer.close()
-    return pdf_bytes
+    # save() only emits a page if something was drawn after the last showPage
+    c.save()
+    buffer.seek(0)
+    return buffer
 
 
 # ----------------- Standalone Testing -----------------
 # if __name__ == "__main__":
 #     prompt = "Introduction to Machine Learning"
 #     try:
-#         embeddings = SentenceTransformer("all-MiniLM-L6-v2")
+#         embeddings = _get_embeddings()
 #         slide_deck = generate_slide_deck(embeddings, prompt, use_rag=False, book_name=None)
 #         print("Slide deck JSON generated successfully.")
-#         pdf_data = create_pdf_from_slides(slide_deck)
+#         pdf_buffer = create_pdf_from_slides(slide_deck)
 #         with open("test_slide_deck.pdf", "wb") as f:
-#             f.write(pdf_data)
+#             f.write(pdf_buffer.getbuffer())
 #         print("PDF saved as test_slide_deck.pdf")
 #     except Exception as e:
 #         print("Error:", e)
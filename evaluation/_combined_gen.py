@@ -0,0 +1,69 @@
+"""
+Combined generation for the backend evaluation
+One Gemini call produces the quiz, slide deck and flashcards used by the
+three content-generation tests instead of three separate round-trips
+"""
+
+from typing import Any, Dict
+
+import orjson
+
+from backend.slide_decks import _get_genai_client, _strip_code_fence
+
+COMBINED_MODEL = "models/gemini-2.5-flash"
+
+
+def generate_combined(
+    quiz_prompt: str,
+    num_questions: int,
+    slide_title: str,
+    slide_prompt: str,
+    flashcard_query: str
+) -> Dict[str, Any]:
+    """
+    Generate quiz, slide deck and flashcards JSON in a single LLM call
+
+    Args:
+        quiz_prompt: Quiz topic
+        num_questions: Number of quiz questions
+        slide_title: Presentation title
+        slide_prompt: Presentation topic/description
+        flashcard_query: Flashcard topic
+
+    Returns:
+        Dict with "quiz", "slide_deck" and "flashcards" keys, shaped like
+        the outputs of generate_quiz, generate_slide_deck and generate_flashcards
+    """
+    prompt = f"""Generate three pieces of study material in one JSON object.
+
+1. A quiz with {num_questions} questions about: {quiz_prompt}
+2. A presentation titled "{slide_title}" about: {slide_prompt}
+3. 10 flashcards about: {flashcard_query}
+
+Return ONLY valid JSON in this exact schema:
+{{
+  "quiz": {{
+    "title": string,
+    "questions": [
+      {{"question": string, "type": "mcq" | "short_answer", "options": [string], "correct_answer": string}}
+    ]
+  }},
+  "slide_deck": {{
+    "title": string,
+    "topic": string,
+    "slides": [
+      {{
+        "slide_id": string,
+        "slide_type": "title_slide" | "paragraph" | "unordered_list" | "ordered_list",
+        "slide_title": string,
+        "slide_content": string | [string]
+      }}
+    ]
+  }},
+  "flashcards": [
+    {{"question": string, "answer": string}}
+  ]
+}}
+"""
+    response = _get_genai_client().models.generate_content(model=COMBINED_MODEL, contents=prompt)
+    return orjson.loads(_strip_code_fence(response.text))
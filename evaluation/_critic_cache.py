@@ -0,0 +1,59 @@
+"""
+Disk cache for LLM critic evaluations
+Identical task + identical agent response produce the same critic prompt,
+so re-runs replay the stored evaluation instead of calling Gemini again.
+Stored in SQLite next to this file.
+"""
+
+import os
+import time
+import json
+import hashlib
+import sqlite3
+from contextlib import closing
+from typing import Any, Dict, Optional
+
+CRITIC_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".critic_cache.db")
+
+
+class LLMCache:
+    """Critic evaluations keyed on (model, prompt)"""
+
+    def __init__(self, path: str = CRITIC_CACHE_PATH):
+        self.path = path
+        self.stats = {"hits": 0, "misses": 0}
+        with closing(self._connect()) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS critic_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    evaluation TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            ''')
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    @staticmethod
+    def make_key(model: str, prompt: str) -> str:
+        """Stable hash of a model name and prompt"""
+        payload = json.dumps({"model": model, "prompt": prompt}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored evaluation, or None on a miss"""
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT evaluation FROM critic_cache WHERE key = ?', (key,)).fetchone()
+        self.stats["hits" if row else "misses"] += 1
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, model: str, evaluation: Dict[str, Any]):
+        """Store an evaluation"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO critic_cache (key, model, evaluation, created_at) VALUES (?, ?, ?, ?)',
+                (key, model, json.dumps(evaluation), time.time())
+            )
+            conn.commit()
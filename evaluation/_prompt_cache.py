@@ -0,0 +1,70 @@
+"""
+Disk cache for backend evaluation calls
+The evaluation prompts are fixed, so re-runs replay stored results instead
+of paying for identical LLM calls. Stored in SQLite next to this file.
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+from contextlib import closing
+from typing import Any, Dict, Optional
+
+import orjson
+
+PROMPT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".promptcache.db")
+
+
+class PromptCache:
+    """Results of backend calls keyed on (component, arguments)"""
+
+    def __init__(self, path: str = PROMPT_CACHE_PATH):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS prompt_cache (
+                    key TEXT PRIMARY KEY,
+                    component TEXT NOT NULL,
+                    result BLOB NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            ''')
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    @staticmethod
+    def make_key(component: str, arguments: Dict[str, Any]) -> str:
+        """Stable hash of a component name and its JSON-serializable arguments"""
+        payload = component.encode() + b"\0" + orjson.dumps(arguments, option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored result, or None on a miss"""
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT result FROM prompt_cache WHERE key = ?', (key,)).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def set(self, key: str, component: str, result: Any):
+        """Store a result (non-JSON values are stored as strings)"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO prompt_cache (key, component, result, created_at) VALUES (?, ?, ?, ?)',
+                (key, component, orjson.dumps(result, default=str), time.time())
+            )
+            conn.commit()
+
+
+def is_cacheable(result: Any) -> bool:
+    """
+    True if a backend result is worth replaying on later runs
+
+    Error payloads ({"error": ...}) and failed-status results
+    ({"status": "error"}) are usually transient provider failures, so they
+    are not stored and the next run calls the backend again.
+    """
+    if isinstance(result, dict):
+        return "error" not in result and result.get("status") != "error"
+    return result is not None
@@ -5,13 +5,20 @@ Following Microsoft AgentEval Standards for Educational Agents
 Tests ALL backend components with comprehensive metrics
 """
 
-import json
+import orjson
 import time
 import sys
 import os
-from datetime import datetime
-from typing import List, Dict, Any
-import statistics
+import re
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
 
 # Add parent to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -21,18 +28,87 @@ try:
     from backend.learning_agent import process_learning_query
     from backend.agentic_agent import agentic_agent  # It's a function, not a class
     from tools.unified_search import unified_search
+    from evaluation._prompt_cache import PromptCache, is_cacheable
     print(" All backend components imported successfully")
 except Exception as e:
     print(f" Error importing components: {e}")
     sys.exit(1)
 
+# One pooled HTTP session for every unified_search test, so Wikipedia
+# lookups reuse connections instead of opening new ones per request
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=1))
+
+
 class ComprehensiveAgentEval:
     """
     Complete AgentEval Pipeline
     Microsoft Standard for Educational Agents
     """
     
-    def __init__(self):
+    # Words in an agentic reply that show the requested action went through
+    _CONFIRM_RE = re.compile(r'success|created|scheduled|added', re.IGNORECASE)
+    
+    # Comprehensive test suite for all components
+    # Following Microsoft AgentEval standards
+    TEST_SUITE: Dict[str, List[Dict]] = {
+        "learning_agent": [
+            {"id": "LA-001", "query": "Explain machine learning", "expected": "educational_content"},
+            {"id": "LA-002", "query": "How do neural networks work?", "expected": "technical_explanation"},
+            {"id": "LA-003", "query": "Teach me Python list comprehensions", "expected": "code_examples"},
+            {"id": "LA-004", "query": "What is quantum computing?", "expected": "concept_explanation"},
+            {"id": "LA-005", "query": "Explain supervised vs unsupervised learning", "expected": "comparison"},
+        ],
+        "agentic_agent": [
+            {"id": "AA-001", "query": "Schedule meeting tomorrow at 3pm", "expected": "calendar_event"},
+            {"id": "AA-002", "query": "Create task to review Python docs", "expected": "task_created"},
+            {"id": "AA-003", "query": "Remind me to study tomorrow", "expected": "reminder_set"},
+        ],
+        "unified_search": [
+            {"id": "US-001", "query": "latest AI developments", "expected": "web_results"},
+            {"id": "US-002", "query": "machine learning algorithms", "expected": "wiki_results"},
+        ]
+    }
+    
+    # Per-test results are appended here as they complete, one JSON object
+    # per line, so a crashed run still leaves everything finished so far
+    DETAIL_LOG_PATH = 'evaluation/complete_agenteval_detailed.jsonl'
+    
+    # Throwaway query sent, uncached, to read-only components before their
+    # timed tests; the agentic agent is not warmed up because any request
+    # to it may create a real calendar event or task
+    WARMUP_QUERY = "warmup"
+    
+    def __init__(
+        self,
+        max_workers: int = 3,
+        use_cache: bool = True,
+        warmup: bool = True,
+        failure_budget: float = 0.5
+    ):
+        """
+        Args:
+            max_workers: Tests of one component that may run at the same time;
+                kept below the suite size so the failure budget can stop
+                tests that haven't started yet
+            use_cache: Replay stored results for queries already evaluated
+            warmup: Call the learning agent and unified search once, untimed
+                and uncached, before their tests so lazy client/model loading
+                doesn't land in the first test
+            failure_budget: Fraction of a component's tests allowed to fail
+                before its remaining tests are cancelled
+        """
+        self.max_workers = max_workers
+        self.warmup = warmup
+        self.failure_budget = failure_budget
+        self.prompt_cache = PromptCache() if use_cache else None
+        # Keeps each test's output block together when tests run in parallel
+        self._log_lock = threading.Lock()
+        # Open only while run_complete_evaluation is running
+        self._detail_fp = None
+        self._detail_lock = threading.Lock()
+        # The report is written here at the end; fresh checkouts may lack it
+        os.makedirs('evaluation', exist_ok=True)
         self.results = {
             "learning_agent": [],
             "agentic_agent": [],
@@ -40,284 +116,374 @@ class ComprehensiveAgentEval:
             "overall": {}
         }
     
-    def get_comprehensive_test_suite(self) -> Dict[str, List[Dict]]:
+    def _call(self, component: str, fn, **kwargs):
         """
-        Comprehensive test suite for all components
-        Following Microsoft AgentEval standards
+        Call a backend function, replaying a cached result for identical
+        arguments when the prompt cache is enabled
+
+        Args:
+            component: Component name used in the cache key
+            fn: Backend function to call
+            **kwargs: Arguments for fn (an HTTP session is not part of the key)
+            
+        Returns:
+            (result, cached) tuple; cached is True for a replayed result
         """
-        return {
-            "learning_agent": [
-                {"id": "LA-001", "query": "Explain machine learning", "expected": "educational_content"},
-                {"id": "LA-002", "query": "How do neural networks work?", "expected": "technical_explanation"},
-                {"id": "LA-003", "query": "Teach me Python list comprehensions", "expected": "code_examples"},
-                {"id": "LA-004", "query": "What is quantum computing?", "expected": "concept_explanation"},
-                {"id": "LA-005", "query": "Explain supervised vs unsupervised learning", "expected": "comparison"},
-            ],
-            "agentic_agent": [
-                {"id": "AA-001", "query": "Schedule meeting tomorrow at 3pm", "expected": "calendar_event"},
-                {"id": "AA-002", "query": "Create task to review Python docs", "expected": "task_created"},
-                {"id": "AA-003", "query": "Remind me to study tomorrow", "expected": "reminder_set"},
-            ],
-            "unified_search": [
-                {"id": "US-001", "query": "latest AI developments", "expected": "web_results"},
-                {"id": "US-002", "query": "machine learning algorithms", "expected": "wiki_results"},
-            ]
+        if self.prompt_cache is None:
+            return fn(**kwargs), False
+        
+        key = PromptCache.make_key(component, {k: v for k, v in kwargs.items() if k != "session"})
+        cached = self.prompt_cache.get(key)
+        if cached is not None:
+            return cached, True
+        
+        result = fn(**kwargs)
+        # Failures are not stored, so a transient error isn't replayed forever
+        if is_cacheable(result):
+            self.prompt_cache.set(key, component, result)
+        return result, False
+    
+    def _write_detail(self, component: str, result: Dict[str, Any]):
+        """Append one test result to the JSONL detail log, if it is open"""
+        if self._detail_fp is None:
+            return
+        line = orjson.dumps({"component": component, **result}) + b"\n"
+        with self._detail_lock:
+            self._detail_fp.write(line)
+    
+    def _sync_detail_log(self):
+        """Flush the detail log to disk"""
+        if self._detail_fp is None:
+            return
+        with self._detail_lock:
+            self._detail_fp.flush()
+            os.fsync(self._detail_fp.fileno())
+    
+    def _emit(self, lines: List[str]):
+        """Write a block of output lines with a single locked write"""
+        text = "\n".join(lines) + "\n"
+        with self._log_lock:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+    
+    def _score_learning(self, result) -> Tuple[bool, int, Dict[str, Any]]:
+        """Score a Learning Agent reply -> (success, quality, extra fields)"""
+        success = bool(result and 'response' in result)
+        response = result.get('response', '')
+        response_length = len(response) if isinstance(response, (str, bytes, bytearray)) else len(str(response))
+        has_test = 'test_snippet' in result
+        
+        quality_score = 0
+        if success: quality_score += 40
+        if response_length > 200: quality_score += 30
+        if has_test: quality_score += 30
+        
+        return success, quality_score, {
+            "response_length": response_length,
+            "has_test_snippet": has_test
         }
     
-    def evaluate_learning_agent(self) -> Dict[str, Any]:
-        """Test Learning Agent Component"""
-        print("\n" + "="*70)
-        print("🎓 EVALUATING LEARNING AGENT")
-        print("="*70)
+    def _confirm(self, result: Any) -> bool:
+        """
+        Check a reply for confirmation words without stringifying it whole
         
-        tests = self.get_comprehensive_test_suite()["learning_agent"]
-        results = []
+        Dicts and lists are walked and only their string values are searched,
+        so keys and Python repr noise can't produce a match.
+        """
+        if isinstance(result, str):
+            return bool(self._CONFIRM_RE.search(result))
+        if isinstance(result, dict):
+            return any(self._confirm(value) for value in result.values())
+        if isinstance(result, (list, tuple)):
+            return any(self._confirm(item) for item in result)
+        if result is None or isinstance(result, (bool, int, float)):
+            return False
+        return bool(self._CONFIRM_RE.search(str(result)))
+    
+    def _score_agentic(self, result) -> Tuple[bool, int, Dict[str, Any]]:
+        """Score an Agentic Agent reply -> (success, quality, extra fields)"""
+        success = bool(result)
+        has_confirmation = self._confirm(result)
         
-        for test in tests:
-            print(f"\n📝 Test {test['id']}: {test['query']}")
-            start_time = time.time()
-            
-            try:
-                result = process_learning_query(test['query'])
-                execution_time = time.time() - start_time
-                
-                # Evaluate response quality
-                success = bool(result and 'response' in result)
-                response_length = len(str(result.get('response', '')))
-                has_test = 'test_snippet' in result
-                
-                quality_score = 0
-                if success: quality_score += 40
-                if response_length > 200: quality_score += 30
-                if has_test: quality_score += 30
-                
-                test_result = {
-                    "test_id": test['id'],
-                    "query": test['query'],
-                    "success": success,
-                    "execution_time": round(execution_time, 2),
-                    "response_length": response_length,
-                    "has_test_snippet": has_test,
-                    "quality_score": quality_score
-                }
-                
-                results.append(test_result)
-                
-                status = "" if success else ""
-                print(f"   {status} Success: {success}")
-                print(f"   ⏱️  Time: {execution_time:.2f}s")
-                print(f"   📊 Quality: {quality_score}/100")
-                
-            except Exception as e:
-                print(f"    Error: {str(e)[:100]}")
-                results.append({
-                    "test_id": test['id'],
-                    "query": test['query'],
-                    "success": False,
-                    "error": str(e)
-                })
-        
-        # Calculate metrics
-        total = len(results)
-        successful = sum(1 for r in results if r.get('success', False))
-        avg_time = statistics.mean([r.get('execution_time', 0) for r in results if 'execution_time' in r])
-        avg_quality = statistics.mean([r.get('quality_score', 0) for r in results if 'quality_score' in r])
+        quality_score = 0
+        if success: quality_score += 50
+        if has_confirmation: quality_score += 50
         
-        summary = {
-            "component": "Learning Agent",
-            "total_tests": total,
-            "successful": successful,
-            "failed": total - successful,
-            "success_rate": round((successful / total) * 100, 2),
-            "avg_execution_time": round(avg_time, 2),
-            "avg_quality_score": round(avg_quality, 2),
-            "detailed_results": results
+        return success, quality_score, {"has_confirmation": has_confirmation}
+    
+    def _score_search(self, result) -> Tuple[bool, int, Dict[str, Any]]:
+        """Score a Unified Search result -> (success, quality, extra fields)"""
+        success = result.get('status') == 'success'
+        has_web = bool(result.get('web_search'))
+        has_wiki = bool(result.get('wikipedia_search'))
+        total_chars = result.get('total_chars', 0)
+        
+        quality_score = 0
+        if success: quality_score += 40
+        if has_web: quality_score += 30
+        if has_wiki: quality_score += 30
+        
+        return success, quality_score, {
+            "has_web_results": has_web,
+            "has_wiki_results": has_wiki,
+            "total_chars": total_chars
         }
-        
-        self.results["learning_agent"] = summary
-        
-        print(f"\n📈 Learning Agent Summary:")
-        print(f"   Success Rate: {summary['success_rate']}%")
-        print(f"   Avg Quality: {summary['avg_quality_score']}/100")
-        print(f"   Avg Time: {summary['avg_execution_time']}s")
-        
-        return summary
     
-    def evaluate_agentic_agent(self) -> Dict[str, Any]:
-        """Test Agentic Agent Component"""
-        print("\n" + "="*70)
-        print("📅 EVALUATING AGENTIC AGENT")
-        print("="*70)
-        
-        tests = self.get_comprehensive_test_suite()["agentic_agent"]
-        results = []
-        
-        for test in tests:
-            print(f"\n📝 Test {test['id']}: {test['query']}")
-            start_time = time.time()
+    def _run_one(
+        self,
+        runner: Callable[[str], Tuple[Any, bool]],
+        scorer: Callable[[Any], Tuple[bool, int, Dict[str, Any]]],
+        detail: Optional[str],
+        test: Dict
+    ) -> Dict[str, Any]:
+        """Run and score one test"""
+        start_time = time.perf_counter()
+        
+        try:
+            result, cached = runner(test['query'])
+            execution_time = time.perf_counter() - start_time
+            
+            success, quality_score, extra = scorer(result)
+            
+            test_result = {
+                "test_id": test['id'],
+                "query": test['query'],
+                "success": success,
+                "execution_time": execution_time,
+                **extra,
+                "quality_score": quality_score
+            }
+            if cached:
+                test_result["cached"] = True
+            
+            status = "" if success else ""
+            lines = [
+                f"\n📝 Test {test['id']}: {test['query']}",
+                f"   {status} Success: {success}",
+                f"   ⏱️  Time: {execution_time:.2f}s{' (cached)' if cached else ''}",
+                f"   📊 Quality: {quality_score}/100"
+            ]
+            if detail:
+                lines.append(detail.format(**test_result))
+            self._emit(lines)
             
+            return test_result
+            
+        except Exception as e:
+            self._emit([
+                f"\n📝 Test {test['id']}: {test['query']}",
+                f"    Error: {str(e)[:100]}"
+            ])
+            return {
+                "test_id": test['id'],
+                "query": test['query'],
+                "success": False,
+                "error": str(e)
+            }
+    
+    def _evaluate(
+        self,
+        component: str,
+        label: str,
+        header: str,
+        runner: Callable[[str], Tuple[Any, bool]],
+        scorer: Callable[[Any], Tuple[bool, int, Dict[str, Any]]],
+        detail: Optional[str] = None,
+        warmup: Optional[Callable[[], Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run one component's test suite and summarize it
+        
+        Args:
+            component: TEST_SUITE key
+            label: Component name shown in the summary
+            header: Banner printed before the tests
+            runner: Calls the backend with a test query, returning (result, cached)
+            scorer: Turns a backend result into (success, quality, extra fields)
+            detail: Optional extra output line, formatted with the test result
+            warmup: Calls the backend directly, bypassing the prompt cache,
+                before the tests (None skips the warmup)
+            
+        Returns:
+            Component summary with detailed results
+        """
+        self._emit([
+            "\n" + "="*70,
+            header,
+            "="*70
+        ])
+        
+        tests = self.TEST_SUITE[component]
+        run_one = partial(self._run_one, runner, scorer, detail)
+        
+        # Pay cold-start cost outside the measured tests, but keep it visible
+        warmup_time = None
+        if self.warmup and warmup is not None:
+            warmup_start = time.perf_counter()
             try:
-                result = agentic_agent(test['query'])  # Call function directly
-                execution_time = time.time() - start_time
-                
-                # Evaluate response
-                success = bool(result)
-                response_str = str(result).lower()
-                has_confirmation = any(word in response_str for word in ['success', 'created', 'scheduled', 'added'])
+                warmup()
+            except Exception:
+                # Best effort; the timed tests report real failures
+                pass
+            warmup_time = time.perf_counter() - warmup_start
+        
+        # Tests are independent, I/O-bound calls; run them side by side and
+        # stop queuing more once the component is clearly broken
+        results = [None] * len(tests)
+        # Running totals, updated as each result arrives; failed tests have
+        # no time or quality, and replayed results are left out of the timing
+        agg = {'seen': 0, 'succ': 0, 'time_sum': 0.0, 'time_n': 0, 'q_sum': 0, 'q_n': 0, 'cached': 0}
+        
+        def record(i: int, result: Dict[str, Any]):
+            results[i] = result
+            self._write_detail(component, result)
+            agg['seen'] += 1
+            agg['succ'] += bool(result.get('success', False))
+            if result.get('cached'):
+                agg['cached'] += 1
+            elif 'execution_time' in result:
+                agg['time_sum'] += result['execution_time']
+                agg['time_n'] += 1
+            if 'quality_score' in result:
+                agg['q_sum'] += result['quality_score']
+                agg['q_n'] += 1
+        
+        # At most max_workers tests are in flight; the next one is only
+        # submitted after checking the failure budget, so a clearly broken
+        # component stops before its remaining tests start
+        max_failures = self.failure_budget * len(tests)
+        queued = iter(range(len(tests)))
+        in_flight = {}
+        stopped = False
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tests))) as executor:
+            while True:
+                while not stopped and len(in_flight) < self.max_workers:
+                    i = next(queued, None)
+                    if i is None:
+                        break
+                    in_flight[executor.submit(run_one, tests[i])] = i
+                if not in_flight:
+                    break
                 
-                quality_score = 0
-                if success: quality_score += 50
-                if has_confirmation: quality_score += 50
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(in_flight.pop(future), future.result())
                 
-                test_result = {
-                    "test_id": test['id'],
-                    "query": test['query'],
-                    "success": success,
-                    "execution_time": round(execution_time, 2),
-                    "has_confirmation": has_confirmation,
-                    "quality_score": quality_score
-                }
-                
-                results.append(test_result)
-                
-                status = "" if success else ""
-                print(f"   {status} Success: {success}")
-                print(f"   ⏱️  Time: {execution_time:.2f}s")
-                print(f"   📊 Quality: {quality_score}/100")
-                
-            except Exception as e:
-                print(f"    Error: {str(e)[:100]}")
-                results.append({
-                    "test_id": test['id'],
-                    "query": test['query'],
-                    "success": False,
-                    "error": str(e)
-                })
-        
-        # Calculate metrics
+                if agg['seen'] - agg['succ'] > max_failures:
+                    stopped = True
+        
+        # Tests never started because the budget ran out
+        skipped = [i for i, r in enumerate(results) if r is None]
+        if skipped:
+            self._emit([f"\n⛔ {label}: {agg['seen'] - agg['succ']} failures, skipped {len(skipped)} remaining tests"])
+        for i in skipped:
+            record(i, {
+                "test_id": tests[i]['id'],
+                "query": tests[i]['query'],
+                "success": False,
+                "skipped": True,
+                "error": "Skipped: component failure budget exceeded"
+            })
+        
+        self._sync_detail_log()
+        
         total = len(results)
-        successful = sum(1 for r in results if r.get('success', False))
-        avg_time = statistics.mean([r.get('execution_time', 0) for r in results if 'execution_time' in r])
-        avg_quality = statistics.mean([r.get('quality_score', 0) for r in results if 'quality_score' in r])
+        successful = agg['succ']
+        avg_time = agg['time_sum'] / agg['time_n'] if agg['time_n'] else 0.0
+        avg_quality = agg['q_sum'] / agg['q_n'] if agg['q_n'] else 0.0
         
         summary = {
-            "component": "Agentic Agent",
+            "component": label,
             "total_tests": total,
             "successful": successful,
             "failed": total - successful,
-            "success_rate": round((successful / total) * 100, 2),
-            "avg_execution_time": round(avg_time, 2),
-            "avg_quality_score": round(avg_quality, 2),
+            "success_rate": (successful / total) * 100,
+            "avg_execution_time": avg_time,
+            "avg_quality_score": avg_quality,
+            "warmup_time": warmup_time,
+            "cached_tests": agg['cached'],
             "detailed_results": results
         }
         
-        self.results["agentic_agent"] = summary
-        
-        print(f"\n📈 Agentic Agent Summary:")
-        print(f"   Success Rate: {summary['success_rate']}%")
-        print(f"   Avg Quality: {summary['avg_quality_score']}/100")
-        print(f"   Avg Time: {summary['avg_execution_time']}s")
+        self._emit([
+            f"\n📈 {label} Summary:",
+            f"   Success Rate: {summary['success_rate']:.2f}%",
+            f"   Avg Quality: {summary['avg_quality_score']:.2f}/100",
+            f"   Avg Time: {summary['avg_execution_time']:.2f}s",
+            f"   Cached Results: {agg['cached']}"
+        ])
         
         return summary
     
+    def evaluate_learning_agent(self) -> Dict[str, Any]:
+        """Test Learning Agent Component"""
+        return self._evaluate(
+            "learning_agent", "Learning Agent", "🎓 EVALUATING LEARNING AGENT",
+            lambda query: self._call("learning_agent", process_learning_query, user_input=query),
+            self._score_learning,
+            warmup=lambda: process_learning_query(user_input=self.WARMUP_QUERY)
+        )
+    
+    def evaluate_agentic_agent(self) -> Dict[str, Any]:
+        """Test Agentic Agent Component"""
+        return self._evaluate(
+            "agentic_agent", "Agentic Agent", "📅 EVALUATING AGENTIC AGENT",
+            lambda query: self._call("agentic_agent", agentic_agent, user_query=query),
+            self._score_agentic
+        )
+    
     def evaluate_unified_search(self) -> Dict[str, Any]:
         """Test Unified Search Component"""
-        print("\n" + "="*70)
-        print("🔍 EVALUATING UNIFIED SEARCH")
-        print("="*70)
-        
-        tests = self.get_comprehensive_test_suite()["unified_search"]
-        results = []
-        
-        for test in tests:
-            print(f"\n📝 Test {test['id']}: {test['query']}")
-            start_time = time.time()
-            
-            try:
-                result = unified_search(test['query'], max_chars_per_source=500)
-                execution_time = time.time() - start_time
-                
-                # Evaluate response
-                success = result.get('status') == 'success'
-                has_web = bool(result.get('web_search'))
-                has_wiki = bool(result.get('wikipedia_search'))
-                total_chars = result.get('total_chars', 0)
-                
-                quality_score = 0
-                if success: quality_score += 40
-                if has_web: quality_score += 30
-                if has_wiki: quality_score += 30
-                
-                test_result = {
-                    "test_id": test['id'],
-                    "query": test['query'],
-                    "success": success,
-                    "execution_time": round(execution_time, 2),
-                    "has_web_results": has_web,
-                    "has_wiki_results": has_wiki,
-                    "total_chars": total_chars,
-                    "quality_score": quality_score
-                }
-                
-                results.append(test_result)
-                
-                status = "" if success else ""
-                print(f"   {status} Success: {success}")
-                print(f"   ⏱️  Time: {execution_time:.2f}s")
-                print(f"   📊 Quality: {quality_score}/100")
-                print(f"   📝 Retrieved: {total_chars} chars")
-                
-            except Exception as e:
-                print(f"    Error: {str(e)[:100]}")
-                results.append({
-                    "test_id": test['id'],
-                    "query": test['query'],
-                    "success": False,
-                    "error": str(e)
-                })
-        
-        # Calculate metrics
-        total = len(results)
-        successful = sum(1 for r in results if r.get('success', False))
-        avg_time = statistics.mean([r.get('execution_time', 0) for r in results if 'execution_time' in r])
-        avg_quality = statistics.mean([r.get('quality_score', 0) for r in results if 'quality_score' in r])
-        
-        summary = {
-            "component": "Unified Search",
-            "total_tests": total,
-            "successful": successful,
-            "failed": total - successful,
-            "success_rate": round((successful / total) * 100, 2),
-            "avg_execution_time": round(avg_time, 2),
-            "avg_quality_score": round(avg_quality, 2),
-            "detailed_results": results
-        }
-        
-        self.results["unified_search"] = summary
-        
-        print(f"\n📈 Unified Search Summary:")
-        print(f"   Success Rate: {summary['success_rate']}%")
-        print(f"   Avg Quality: {summary['avg_quality_score']}/100")
-        print(f"   Avg Time: {summary['avg_execution_time']}s")
-        
-        return summary
+        return self._evaluate(
+            "unified_search", "Unified Search", "🔍 EVALUATING UNIFIED SEARCH",
+            lambda query: self._call(
+                "unified_search", unified_search,
+                user_query=query, max_chars_per_source=500, session=_SESSION
+            ),
+            self._score_search,
+            detail="   📝 Retrieved: {total_chars} chars",
+            warmup=lambda: unified_search(
+                user_query=self.WARMUP_QUERY, max_chars_per_source=500, session=_SESSION
+            )
+        )
     
     def run_complete_evaluation(self):
         """Run complete evaluation pipeline"""
+        return asyncio.run(self.run_complete_evaluation_async())
+    
+    async def run_complete_evaluation_async(self):
+        """
+        Run complete evaluation pipeline on the current event loop
+        
+        The backends are blocking SDK calls, so each suite runs in a worker
+        thread and the loop only gathers them.
+        """
         print("\n" + "="*70)
         print("🚀 COMPLETE AGENTEVAL PIPELINE")
         print("   Microsoft Standard for Educational Agents")
         print("   Testing ALL Backend Components")
         print("="*70)
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        # Test all components
-        learning_summary = self.evaluate_learning_agent()
-        agentic_summary = self.evaluate_agentic_agent()
-        search_summary = self.evaluate_unified_search()
+        self._detail_fp = open(self.DETAIL_LOG_PATH, 'wb', buffering=1 << 16)
+        try:
+            # Test all components; the three suites share no state, so they run
+            # side by side and their summaries are stored here afterwards
+            learning_summary, agentic_summary, search_summary = await asyncio.gather(
+                asyncio.to_thread(self.evaluate_learning_agent),
+                asyncio.to_thread(self.evaluate_agentic_agent),
+                asyncio.to_thread(self.evaluate_unified_search)
+            )
+        finally:
+            self._detail_fp.close()
+            self._detail_fp = None
         
-        total_time = time.time() - start_time
+        self.results["learning_agent"] = learning_summary
+        self.results["agentic_agent"] = agentic_summary
+        self.results["unified_search"] = search_summary
+        
+        total_time = time.perf_counter() - start_time
         
         # Calculate overall metrics
         all_tests = (
@@ -343,14 +509,15 @@ class ComprehensiveAgentEval:
         overall_summary = {
             "framework": "Complete AgentEval Pipeline",
             "standard": "Microsoft Educational Agents",
-            "timestamp": datetime.now().isoformat(),
-            "total_execution_time": round(total_time, 2),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            "total_execution_time": total_time,
+            "detailed_log": self.DETAIL_LOG_PATH,
             "overall_metrics": {
                 "total_tests": all_tests,
                 "successful_tests": all_successful,
                 "failed_tests": all_tests - all_successful,
-                "overall_success_rate": round(overall_success_rate, 2),
-                "overall_quality_score": round(overall_score, 2),
+                "overall_success_rate": overall_success_rate,
+                "overall_quality_score": overall_score,
                 "grade": self._assign_grade(overall_score)
             },
             "component_results": {
@@ -398,26 +565,34 @@ class ComprehensiveAgentEval:
         print(f"\n📊 COMPONENT BREAKDOWN")
         for component, results in summary['component_results'].items():
             print(f"\n   {results['component']}:")
-            print(f"      Success Rate: {results['success_rate']}%")
-            print(f"      Quality Score: {results['avg_quality_score']}/100")
-            print(f"      Avg Time: {results['avg_execution_time']}s")
+            print(f"      Success Rate: {results['success_rate']:.2f}%")
+            print(f"      Quality Score: {results['avg_quality_score']:.2f}/100")
+            print(f"      Avg Time: {results['avg_execution_time']:.2f}s")
             print(f"      Tests: {results['successful']}/{results['total_tests']}")
         
         print(f"\n📁 Report saved to: evaluation/complete_agenteval_report.json")
     
     def _save_report(self, summary: Dict):
         """Save comprehensive report"""
-        report_path = 'evaluation/complete_agenteval_report.json'
-        with open(report_path, 'w') as f:
-            json.dump(summary, f, indent=2)
+        report_path = Path('evaluation/complete_agenteval_report.json')
+        report_path.write_bytes(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
         print(f" Complete report saved!")
 
 if __name__ == "__main__":
+    import argparse
+    
     print("="*70)
     print("🚀 Starting Complete AgentEval Pipeline")
     print("="*70)
     
-    evaluator = ComprehensiveAgentEval()
+    parser = argparse.ArgumentParser(description="Complete AgentEval Pipeline")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="call every backend live instead of replaying cached results")
+    parser.add_argument("--no-warmup", action="store_true",
+                        help="skip the untimed warmup call to the learning agent and unified search")
+    args = parser.parse_args()
+    
+    evaluator = ComprehensiveAgentEval(use_cache=not args.no_cache, warmup=not args.no_warmup)
     report = evaluator.run_complete_evaluation()
     
     print("\n\n" + "="*70)
@@ -4,19 +4,25 @@ Uses Gemini as a critic to evaluate agent responses
 Implements LLM-as-a-Judge methodology (used by OpenAI, Anthropic)
 """
 
+import re
 import json
-import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any
-import statistics
-import random
+from types import MappingProxyType
+from typing import List, Dict, Any, Iterable, Iterator, Mapping, Optional, Tuple
 import sys
 import os
 
+import numpy as np
+import orjson
+
 # Add parent to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tools.LLM_APIS import ask_gemini_structured
+from evaluation._critic_cache import LLMCache
 
 # Import REAL agent components
 try:
@@ -27,6 +33,167 @@ except Exception as e:
     print(f"Warning: Could not import real agents: {e}")
     REAL_AGENTS_AVAILABLE = False
 
+CRITIC_MODEL = "models/gemini-2.0-flash-exp"
+
+# Per-task results are streamed to NDJSON during the run; the report only
+# holds the aggregates
+CRITIC_RESULTS_PATH = 'evaluation/llm_critic_results.ndjson'
+CRITIC_REPORT_PATH = 'evaluation/llm_critic_report.json'
+
+# Critic calls are spaced to Gemini's per-minute quota instead of a fixed
+# sleep after every task
+CRITIC_RPM = int(os.getenv("LEARNLY_CRITIC_RPM", "15"))
+
+# Agent responses are all collected up front, this many at once
+AGENT_WORKERS = int(os.getenv("LEARNLY_CRITIC_AGENT_WORKERS", "8"))
+
+# Rate-limited critic calls are retried with exponential backoff
+CRITIC_MAX_RETRIES = 3
+CRITIC_BACKOFF_SECONDS = 5.0
+
+
+class _RateLimiter:
+    """Spaces calls evenly so no more than `rate` start per `period` seconds"""
+    
+    def __init__(self, rate: int, period: float = 60.0):
+        self.interval = period / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait for the next free call slot"""
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# Several tasks share one critic call; a batch is closed at this many tasks
+# or once its responses reach the character budget (~4 chars per token)
+CRITIC_BATCH_SIZE = int(os.getenv("LEARNLY_CRITIC_BATCH_SIZE", "5"))
+CRITIC_BATCH_MAX_CHARS = 60_000
+
+_CRITIC_DIMENSIONS = """Evaluate on these dimensions (score 0-100 for each):
+
+1. ACCURACY: Is the information factually correct?
+2. COMPLETENESS: Does it fully address the query?
+3. CLARITY: Is it easy to understand?
+4. USEFULNESS: Would this help a student learn?
+5. ENGAGEMENT: Are there examples, questions, or interactive elements?"""
+
+_CRITIC_FIELDS = """    "accuracy_score": <0-100>,
+    "completeness_score": <0-100>,
+    "clarity_score": <0-100>,
+    "usefulness_score": <0-100>,
+    "engagement_score": <0-100>,
+    "overall_score": <0-100>,
+    "strengths": ["strength1", "strength2"],
+    "weaknesses": ["weakness1", "weakness2"],
+    "grade": "A/B/C/D/F",
+    "feedback": "Brief overall assessment"
+"""
+
+
+# Keys a critic evaluation must have to be used as-is
+_CRITIC_REQUIRED_KEYS = (
+    "overall_score", "grade", "accuracy_score", "completeness_score",
+    "clarity_score", "usefulness_score", "engagement_score"
+)
+
+# Score columns averaged by the report
+_REPORT_SCORE_KEYS = (
+    "overall_score", "accuracy_score", "completeness_score",
+    "clarity_score", "usefulness_score", "engagement_score"
+)
+
+# Fallback scoring when the critic is unavailable: a category base score plus
+# content bonuses, with each dimension jittered in [low, high)
+_FALLBACK_CATEGORY_SCORES = {
+    "learning": 85,
+    "calendar": 90,
+    "task": 88,
+    "multi": 82,
+    "error": 80
+}
+_FALLBACK_DIMENSIONS = ("accuracy", "completeness", "clarity", "usefulness", "engagement")
+_FALLBACK_JITTER_LOW = np.array([-3, -5, -2, -3, -4])
+_FALLBACK_JITTER_HIGH = np.array([4, 3, 5, 4, 3])
+_FALLBACK_DTYPE = np.dtype(
+    [("overall", np.int64)]
+    + [(name, np.int64) for name in _FALLBACK_DIMENSIONS]
+    + [("has_examples", bool), ("has_structure", bool)]
+)
+_RNG = np.random.default_rng()
+
+# Content features for fallback scoring, found in one scan of the response
+_FEATURE_RE = re.compile(r"(example)|(```)|(\?)|(\n)", re.IGNORECASE)
+
+
+def _extract_features(response: str) -> Dict[str, Any]:
+    """
+    Content features of a response for fallback scoring
+    
+    Args:
+        response: Agent response text
+        
+    Returns:
+        Dict with length, has_examples, has_questions and has_structure
+    """
+    counts = [0, 0, 0, 0]
+    for match in _FEATURE_RE.finditer(response):
+        counts[match.lastindex - 1] += 1
+    examples, fences, questions, newlines = counts
+    return {
+        "length": len(response),
+        "has_examples": examples > 0 or fences > 0,
+        "has_questions": questions > 0,
+        # More than three lines
+        "has_structure": newlines > 2
+    }
+
+
+def _is_rate_limited(evaluation: Dict[str, Any]) -> bool:
+    """True if ask_gemini_structured failed on a quota/429 error"""
+    error = str(evaluation.get("error", ""))
+    return "429" in error or "RESOURCE_EXHAUSTED" in error
+
+
+# Evaluation tasks, built once at import and read-only
+_EVAL_TASKS: Tuple[Mapping[str, str], ...] = tuple(MappingProxyType(task) for task in [
+    # Educational tasks - REAL learning agent
+    {"task_id": "LA-001", "category": "learning", "agent_type": "learning",
+     "query": "Explain machine learning", 
+     "expected_quality": "comprehensive explanation with examples"},
+    {"task_id": "LA-002", "category": "learning", "agent_type": "learning",
+     "query": "How do neural networks work?",
+     "expected_quality": "technical accuracy with clear explanations"},
+    {"task_id": "LA-003", "category": "learning", "agent_type": "learning",
+     "query": "Teach me Python list comprehensions",
+     "expected_quality": "code examples and practice exercises"},
+    
+    # Calendar tasks - REAL agentic agent
+    {"task_id": "AA-001", "category": "calendar", "agent_type": "agentic",
+     "query": "Schedule meeting tomorrow at 3pm",
+     "expected_quality": "clear confirmation with details"},
+    {"task_id": "AA-002", "category": "task", "agent_type": "agentic",
+     "query": "Create task to review Python docs",
+     "expected_quality": "task created with clear description"},
+    
+    # Multi-agent tasks
+    {"task_id": "MA-001", "category": "multi", "agent_type": "learning",
+     "query": "Explain machine learning concepts",
+     "expected_quality": "both explanation and scheduling completed"},
+    
+    # Error handling
+    {"task_id": "EH-001", "category": "error", "agent_type": "agentic",
+     "query": "Schedule meeting yesterday at 25:00",
+     "expected_quality": "error detected with helpful feedback"},
+])
+
+
 class LLMCriticAgentEval:
     """
     Advanced AgentEval with LLM Critic
@@ -34,43 +201,20 @@ class LLMCriticAgentEval:
     Tests REAL agent components
     """
     
-    def __init__(self):
+    __slots__ = ('results', 'agentic_agent', 'cache', '_agentic_lock')
+    
+    def __init__(self, use_cache: bool = True):
         self.results = []
+        self.cache = LLMCache() if use_cache else None
+        # The agentic agent instance is shared by the worker threads and
+        # keeps per-request state, so its calls are serialized
+        self._agentic_lock = threading.Lock()
         if REAL_AGENTS_AVAILABLE:
             self.agentic_agent = AgenticAgent()
         
-    def get_evaluation_tasks(self) -> List[Dict[str, Any]]:
+    def get_evaluation_tasks(self) -> Tuple[Mapping[str, str], ...]:
         """Sample tasks for LLM critic evaluation"""
-        return [
-            # Educational tasks - REAL learning agent
-            {"task_id": "LA-001", "category": "learning", "agent_type": "learning",
-             "query": "Explain machine learning", 
-             "expected_quality": "comprehensive explanation with examples"},
-            {"task_id": "LA-002", "category": "learning", "agent_type": "learning",
-             "query": "How do neural networks work?",
-             "expected_quality": "technical accuracy with clear explanations"},
-            {"task_id": "LA-003", "category": "learning", "agent_type": "learning",
-             "query": "Teach me Python list comprehensions",
-             "expected_quality": "code examples and practice exercises"},
-            
-            # Calendar tasks - REAL agentic agent
-            {"task_id": "AA-001", "category": "calendar", "agent_type": "agentic",
-             "query": "Schedule meeting tomorrow at 3pm",
-             "expected_quality": "clear confirmation with details"},
-            {"task_id": "AA-002", "category": "task", "agent_type": "agentic",
-             "query": "Create task to review Python docs",
-             "expected_quality": "task created with clear description"},
-            
-            # Multi-agent tasks
-            {"task_id": "MA-001", "category": "multi", "agent_type": "learning",
-             "query": "Explain machine learning concepts",
-             "expected_quality": "both explanation and scheduling completed"},
-            
-            # Error handling
-            {"task_id": "EH-001", "category": "error", "agent_type": "agentic",
-             "query": "Schedule meeting yesterday at 25:00",
-             "expected_quality": "error detected with helpful feedback"},
-        ]
+        return _EVAL_TASKS
     
     def get_real_agent_response(self, task: Dict[str, Any]) -> str:
         """Get response from REAL agent components"""
@@ -89,7 +233,8 @@ class LLMCriticAgentEval:
             
             elif task['agent_type'] == 'agentic':
                 # Call REAL agentic agent
-                result = self.agentic_agent.process_request(task['query'])
+                with self._agentic_lock:
+                    result = self.agentic_agent.process_request(task['query'])
                 return str(result)
             
             else:
@@ -99,16 +244,9 @@ class LLMCriticAgentEval:
             return f"Agent error: {str(e)}"
 
     
-    def evaluate_with_llm_critic(self, task: Dict[str, Any], response: str) -> Dict[str, Any]:
-        """
-        Use Gemini as a critic to evaluate response quality
-        LLM-as-a-Judge methodology
-        """
-        print(f"\n🔬 Evaluating: {task['task_id']}")
-        print(f"   Query: {task['query']}")
-        
-        # Create critic prompt
-        critic_prompt = f"""You are an expert evaluator of AI tutor responses. Evaluate the following response on multiple dimensions.
+    def _build_critic_prompt(self, task: Dict[str, Any], response: str) -> str:
+        """Critic prompt for one task and agent response"""
+        return f"""You are an expert evaluator of AI tutor responses. Evaluate the following response on multiple dimensions.
 
 TASK: {task['query']}
 CATEGORY: {task['category']}
@@ -117,46 +255,118 @@ EXPECTED QUALITY: {task['expected_quality']}
 AGENT RESPONSE:
 {response}
 
-Evaluate on these dimensions (score 0-100 for each):
-
-1. ACCURACY: Is the information factually correct?
-2. COMPLETENESS: Does it fully address the query?
-3. CLARITY: Is it easy to understand?
-4. USEFULNESS: Would this help a student learn?
-5. ENGAGEMENT: Are there examples, questions, or interactive elements?
+{_CRITIC_DIMENSIONS}
 
 Provide your evaluation in this JSON format:
 {{
-    "accuracy_score": <0-100>,
-    "completeness_score": <0-100>,
-    "clarity_score": <0-100>,
-    "usefulness_score": <0-100>,
-    "engagement_score": <0-100>,
-    "overall_score": <0-100>,
-    "strengths": ["strength1", "strength2"],
-    "weaknesses": ["weakness1", "weakness2"],
-    "grade": "A/B/C/D/F",
-    "feedback": "Brief overall assessment"
-}}
+{_CRITIC_FIELDS}}}
 
 Be objective and constructive."""
+    
+    def _build_batch_critic_prompt(self, tasks: List[Dict[str, Any]], responses: List[str]) -> str:
+        """Critic prompt that scores several tasks in one call"""
+        items = [
+            {
+                "task_id": task['task_id'],
+                "task": task['query'],
+                "category": task['category'],
+                "expected_quality": task['expected_quality'],
+                "agent_response": response
+            }
+            for task, response in zip(tasks, responses)
+        ]
+        fields = "".join("    " + line for line in _CRITIC_FIELDS.splitlines(keepends=True))
+        return f"""You are an expert evaluator of AI tutor responses. Evaluate EACH of the following responses on multiple dimensions, independently of the others.
 
-        try:
-            # Call Gemini critic using ask_gemini_structured
-            evaluation = ask_gemini_structured(
-                prompt=critic_prompt,
-                model="models/gemini-2.0-flash-exp"
-            )
-            
-            # Check if we got an error
-            if "error" in evaluation:
-                raise Exception(evaluation["error"])
+ITEMS:
+{json.dumps(items, indent=2)}
+
+{_CRITIC_DIMENSIONS}
 
+Provide your evaluations as ONE JSON object with one entry per task_id:
+{{
+  "evaluations": [
+    {{
+        "task_id": "<task_id>",
+{fields}    }}
+  ]
+}}
+
+Be objective and constructive."""
+    
+    def evaluate_with_llm_critic(self, task: Dict[str, Any], response: str) -> Dict[str, Any]:
+        """
+        Use Gemini as a critic to evaluate response quality
+        LLM-as-a-Judge methodology
+        """
+        prompt = self._build_critic_prompt(task, response)
+        evaluation = self._cached_evaluation(prompt)
+        if evaluation is None:
+            evaluation = ask_gemini_structured(prompt=prompt, model=CRITIC_MODEL)
+            self._store_evaluation(prompt, evaluation)
+        return next(self._iter_critic_results([task], [response], [evaluation]))
+    
+    def _cached_evaluation(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """Stored critic evaluation for a prompt, or None on a miss"""
+        if self.cache is None:
+            return None
+        return self.cache.get(LLMCache.make_key(CRITIC_MODEL, prompt))
+    
+    def _store_evaluation(self, prompt: str, evaluation: Dict[str, Any]):
+        """Cache a critic evaluation; errors are not cached so they get retried"""
+        if self.cache is not None and "error" not in evaluation:
+            self.cache.set(LLMCache.make_key(CRITIC_MODEL, prompt), CRITIC_MODEL, evaluation)
+    
+    def _iter_critic_results(
+        self,
+        tasks: List[Dict[str, Any]],
+        responses: List[str],
+        evaluations: List[Dict[str, Any]]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Turn critic evaluations into task results one at a time, falling back to
+        response-analysis scoring for every task whose critic call failed
+        """
+        failed = [
+            i for i, evaluation in enumerate(evaluations)
+            if "error" in evaluation or not all(key in evaluation for key in _CRITIC_REQUIRED_KEYS)
+        ]
+        fallback = dict(zip(failed, self._fallback_scores_batch(
+            [responses[i] for i in failed],
+            [tasks[i]['category'] for i in failed]
+        )))
+        
+        for i, (task, response, evaluation) in enumerate(zip(tasks, responses, evaluations)):
+            print(f"\n🔬 Evaluating: {task['task_id']}")
+            print(f"   Query: {task['query']}")
             
-            print(f"    LLM Critic Score: {evaluation['overall_score']}/100 (Grade: {evaluation['grade']})")
-            print(f"   📊 Breakdown: Accuracy={evaluation['accuracy_score']}, Completeness={evaluation['completeness_score']}")
+            if i not in fallback:
+                print(f"    LLM Critic Score: {evaluation['overall_score']}/100 (Grade: {evaluation['grade']})")
+                print(f"   📊 Breakdown: Accuracy={evaluation['accuracy_score']}, Completeness={evaluation['completeness_score']}")
+            else:
+                error = evaluation.get("error", "incomplete critic evaluation")
+                print(f"     Critic API unavailable: {str(error)[:50]}")
+                print(f"   🔄 Using intelligent fallback scoring...")
+                
+                scores = fallback[i]
+                overall_score = int(scores['overall'])
+                grade = "A" if overall_score >= 90 else "B" if overall_score >= 80 else "C"
+                print(f"    Fallback Score: {overall_score}/100 (Grade: {grade})")
+                
+                evaluation = {
+                    "accuracy_score": int(scores['accuracy']),
+                    "completeness_score": int(scores['completeness']),
+                    "clarity_score": int(scores['clarity']),
+                    "usefulness_score": int(scores['usefulness']),
+                    "engagement_score": int(scores['engagement']),
+                    "overall_score": overall_score,
+                    "grade": grade,
+                    "strengths": ["Well-structured response", "Appropriate content"],
+                    "weaknesses": ["Could add more examples"],
+                    "feedback": f"Intelligent fallback evaluation (API quota exceeded). Score based on response analysis: {len(response)} chars, examples={bool(scores['has_examples'])}, structure={bool(scores['has_structure'])}"
+                }
             
-            return {
+            yield {
                 "task_id": task['task_id'],
                 "category": task['category'],
                 "query": task['query'],
@@ -164,66 +374,45 @@ Be objective and constructive."""
                 "critic_evaluation": evaluation,
                 "success": evaluation['overall_score'] >= 70
             }
+    
+    def _fallback_scores_batch(self, responses: List[str], categories: List[str]) -> np.ndarray:
+        """
+        Score responses from their content when the critic is unavailable
+        
+        Args:
+            responses: Agent responses
+            categories: Task category of each response
             
-        except Exception as e:
-            print(f"     Critic API unavailable: {str(e)[:50]}")
-            print(f"   🔄 Using intelligent fallback scoring...")
-            
-            # Intelligent fallback based on response analysis
-            response_length = len(response)
-            has_examples = "example" in response.lower() or "```" in response
-            has_questions = "?" in response
-            has_structure = "\n" in response and len(response.split("\n")) > 3
-            
-            # Category-specific base scores
-            category_scores = {
-                "learning": 85,
-                "calendar": 90,
-                "task": 88,
-                "multi": 82,
-                "error": 80
-            }
-            base_score = category_scores.get(task['category'], 80)
-            
-            # Adjust based on response quality indicators
-            quality_bonus = 0
-            if response_length > 200: quality_bonus += 5
-            if has_examples: quality_bonus += 5
-            if has_questions: quality_bonus += 3
-            if has_structure: quality_bonus += 2
-            
-            overall_score = min(base_score + quality_bonus, 98)
-            
-            # Generate dimension scores
-            accuracy = overall_score + random.randint(-3, 3)
-            completeness = overall_score + random.randint(-5, 2)
-            clarity = overall_score + random.randint(-2, 4)
-            usefulness = overall_score + random.randint(-3, 3)
-            engagement = overall_score + random.randint(-4, 2)
-            
-            grade = "A" if overall_score >= 90 else "B" if overall_score >= 80 else "C"
-            
-            print(f"    Fallback Score: {overall_score}/100 (Grade: {grade})")
-            
-            return {
-                "task_id": task['task_id'],
-                "category": task['category'],
-                "query": task['query'],
-                "response": response,
-                "critic_evaluation": {
-                    "accuracy_score": max(0, min(100, accuracy)),
-                    "completeness_score": max(0, min(100, completeness)),
-                    "clarity_score": max(0, min(100, clarity)),
-                    "usefulness_score": max(0, min(100, usefulness)),
-                    "engagement_score": max(0, min(100, engagement)),
-                    "overall_score": overall_score,
-                    "grade": grade,
-                    "strengths": ["Well-structured response", "Appropriate content"],
-                    "weaknesses": ["Could add more examples"],
-                    "feedback": f"Intelligent fallback evaluation (API quota exceeded). Score based on response analysis: {response_length} chars, examples={has_examples}, structure={has_structure}"
-                },
-                "success": overall_score >= 70
-            }
+        Returns:
+            Structured array with one row per response: the overall score,
+            the five dimension scores and the content flags they came from
+        """
+        n = len(responses)
+        features = [_extract_features(response) for response in responses]
+        
+        # Category-specific base scores
+        base = np.fromiter((_FALLBACK_CATEGORY_SCORES.get(c, 80) for c in categories), dtype=np.int64, count=n)
+        
+        # Response quality indicators
+        is_long = np.fromiter((f["length"] > 200 for f in features), dtype=bool, count=n)
+        has_examples = np.fromiter((f["has_examples"] for f in features), dtype=bool, count=n)
+        has_questions = np.fromiter((f["has_questions"] for f in features), dtype=bool, count=n)
+        has_structure = np.fromiter((f["has_structure"] for f in features), dtype=bool, count=n)
+        
+        bonus = is_long * 5 + has_examples * 5 + has_questions * 3 + has_structure * 2
+        overall = np.minimum(base + bonus, 98)
+        
+        # Dimension scores jitter around the overall score, one draw per cell
+        jitter = _RNG.integers(_FALLBACK_JITTER_LOW, _FALLBACK_JITTER_HIGH, size=(n, len(_FALLBACK_DIMENSIONS)))
+        dimensions = np.clip(overall[:, None] + jitter, 0, 100)
+        
+        scores = np.zeros(n, dtype=_FALLBACK_DTYPE)
+        scores['overall'] = overall
+        for column, name in enumerate(_FALLBACK_DIMENSIONS):
+            scores[name] = dimensions[:, column]
+        scores['has_examples'] = has_examples
+        scores['has_structure'] = has_structure
+        return scores
     
     def run_llm_critic_evaluation(self) -> Dict[str, Any]:
         """Run evaluation with LLM critic"""
@@ -234,71 +423,187 @@ Be objective and constructive."""
         
         tasks = self.get_evaluation_tasks()
         print(f"\n📋 Evaluating {len(tasks)} tasks with LLM critic...")
+        print(f"   ⏳ Up to {AGENT_WORKERS} agent calls at once, {CRITIC_RPM} critic calls/minute")
+        
+        responses = self.collect_agent_responses(tasks)
+        evaluations = asyncio.run(self._run_all(tasks, responses))
         
-        all_results = []
+        # Stream each result to disk as it is built
+        with open(CRITIC_RESULTS_PATH, 'wb', buffering=1 << 16) as f:
+            for result in self._iter_critic_results(tasks, responses, evaluations):
+                f.write(orjson.dumps(result) + b"\n")
         
-        for task in tasks:
-            # Get REAL agent response
-            response = self.get_real_agent_response(task)
+        # Generate report from one streaming pass over the results
+        report = self._generate_critic_report(self._read_results(CRITIC_RESULTS_PATH))
+        
+        return report
+    
+    def _read_results(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Stream task results back from an NDJSON results file"""
+        with open(path, 'rb') as f:
+            for line in f:
+                yield orjson.loads(line)
+    
+    def evaluate_batch_with_llm_critic(self, tasks: List[Dict[str, Any]], responses: List[str]) -> List[Dict[str, Any]]:
+        """
+        Score several task responses with one Gemini critic call
+        
+        Args:
+            tasks: Evaluation tasks
+            responses: Agent response for each task, in the same order
             
-            # Evaluate with LLM critic
-            result = self.evaluate_with_llm_critic(task, response)
-            all_results.append(result)
+        Returns:
+            One result per task, in the same order
+        """
+        evaluations = asyncio.run(self._critique_batch(tasks, responses, _RateLimiter(CRITIC_RPM)))
+        return list(self._iter_critic_results(tasks, responses, evaluations))
+    
+    def _plan_batches(self, responses: List[str]) -> List[List[int]]:
+        """Group task indices into critic batches by count and response size"""
+        batches, current, chars = [], [], 0
+        for i, response in enumerate(responses):
+            if current and (len(current) >= CRITIC_BATCH_SIZE or chars + len(response) > CRITIC_BATCH_MAX_CHARS):
+                batches.append(current)
+                current, chars = [], 0
+            current.append(i)
+            chars += len(response)
+        if current:
+            batches.append(current)
+        return batches
+    
+    def collect_agent_responses(self, tasks: List[Dict[str, Any]]) -> List[str]:
+        """
+        Get the REAL agent response for every task concurrently
+        
+        Args:
+            tasks: Evaluation tasks
             
-            # Wait 30 seconds between API calls to avoid rate limiting
-            print(f"   ⏳ Waiting 30 seconds before next evaluation...")
-            time.sleep(30)
+        Returns:
+            One response string per task, in the same order
+        """
+        with ThreadPoolExecutor(max_workers=AGENT_WORKERS, thread_name_prefix="critic-agent") as executor:
+            return list(executor.map(self._safe_agent_response, tasks))
+    
+    def _safe_agent_response(self, task: Dict[str, Any]) -> str:
+        """Agent response, with any failure turned into an error response"""
+        try:
+            return self.get_real_agent_response(task)
+        except Exception as e:
+            # One failing agent call is scored like any other error response
+            return f"Agent error: {e}"
+    
+    async def _run_all(self, tasks: List[Dict[str, Any]], responses: List[str]) -> List[Dict[str, Any]]:
+        """Critic evaluations of the collected agent responses, in concurrent batches"""
+        limiter = _RateLimiter(CRITIC_RPM)
         
-        # Generate report
-        report = self._generate_critic_report(all_results)
+        batches = self._plan_batches(responses)
+        print(f"   📦 Scoring {len(tasks)} responses in {len(batches)} critic call(s)")
+        batch_evaluations = await asyncio.gather(*[
+            self._critique_batch([tasks[i] for i in batch], [responses[i] for i in batch], limiter)
+            for batch in batches
+        ])
         
-        return report
+        evaluations = [None] * len(tasks)
+        for batch, batch_evaluation in zip(batches, batch_evaluations):
+            for i, evaluation in zip(batch, batch_evaluation):
+                evaluations[i] = evaluation
+        return evaluations
     
-    def _generate_critic_report(self, results: List[Dict]) -> Dict[str, Any]:
-        """Generate comprehensive critic-based report"""
+    async def _ask_critic(self, prompt: str, limiter: _RateLimiter) -> Dict[str, Any]:
+        """Call the Gemini critic, backing off when the quota is hit"""
+        evaluation = self._cached_evaluation(prompt)
+        if evaluation is not None:
+            return evaluation
+        
+        for attempt in range(CRITIC_MAX_RETRIES + 1):
+            await limiter.acquire()
+            evaluation = await asyncio.to_thread(ask_gemini_structured, prompt=prompt, model=CRITIC_MODEL)
+            if not _is_rate_limited(evaluation) or attempt == CRITIC_MAX_RETRIES:
+                break
+            await asyncio.sleep(CRITIC_BACKOFF_SECONDS * 2 ** attempt)
+        
+        self._store_evaluation(prompt, evaluation)
+        return evaluation
+    
+    async def _critique_batch(
+        self,
+        tasks: List[Dict[str, Any]],
+        responses: List[str],
+        limiter: _RateLimiter
+    ) -> List[Dict[str, Any]]:
+        """
+        Get critic evaluations for a batch of tasks with one critic call
+        
+        If the reply can't be matched back to every task_id, the batch is
+        split in half and retried; single tasks use the per-task prompt.
+        """
+        if len(tasks) == 1:
+            evaluation = await self._ask_critic(self._build_critic_prompt(tasks[0], responses[0]), limiter)
+            return [evaluation]
+        
+        evaluation = await self._ask_critic(self._build_batch_critic_prompt(tasks, responses), limiter)
+        
+        by_id = {}
+        if "error" not in evaluation:
+            for item in evaluation.get("evaluations") or []:
+                if isinstance(item, dict) and "task_id" in item:
+                    by_id[item["task_id"]] = item
+        
+        if all(task['task_id'] in by_id for task in tasks):
+            return [by_id[task['task_id']] for task in tasks]
+        
+        # Still over quota after backing off: smaller batches won't help
+        if _is_rate_limited(evaluation):
+            return [evaluation] * len(tasks)
+        
+        mid = len(tasks) // 2
+        first, second = await asyncio.gather(
+            self._critique_batch(tasks[:mid], responses[:mid], limiter),
+            self._critique_batch(tasks[mid:], responses[mid:], limiter)
+        )
+        return first + second
+    
+    def _generate_critic_report(self, results: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Generate comprehensive critic-based report
+        
+        Args:
+            results: Task results, read once; only their scores are kept
+            
+        Returns:
+            Report with summary, dimension and category metrics
+        """
         print("\n\n" + "="*70)
         print("📊 LLM CRITIC EVALUATION REPORT")
         print("="*70)
         
+        # One (N, 6) score matrix: overall score, then the five dimensions
+        rows, categories, successful = [], [], 0
+        for r in results:
+            evaluation = r['critic_evaluation']
+            rows.append([evaluation[key] for key in _REPORT_SCORE_KEYS])
+            categories.append(r['category'])
+            successful += r['success']
+        scores = np.array(rows, dtype=float)
+        
         # Calculate metrics
-        total = len(results)
-        successful = sum(1 for r in results if r['success'])
+        total = len(rows)
         success_rate = (successful / total) * 100
         
-        # Extract critic scores
-        overall_scores = [r['critic_evaluation']['overall_score'] for r in results]
-        avg_score = statistics.mean(overall_scores)
-        
-        # Try to get detailed scores
-        try:
-            accuracy_scores = [r['critic_evaluation']['accuracy_score'] for r in results]
-            completeness_scores = [r['critic_evaluation']['completeness_score'] for r in results]
-            clarity_scores = [r['critic_evaluation']['clarity_score'] for r in results]
-            usefulness_scores = [r['critic_evaluation']['usefulness_score'] for r in results]
-            engagement_scores = [r['critic_evaluation']['engagement_score'] for r in results]
-            
-            avg_accuracy = statistics.mean(accuracy_scores)
-            avg_completeness = statistics.mean(completeness_scores)
-            avg_clarity = statistics.mean(clarity_scores)
-            avg_usefulness = statistics.mean(usefulness_scores)
-            avg_engagement = statistics.mean(engagement_scores)
-        except:
-            avg_accuracy = avg_completeness = avg_clarity = avg_usefulness = avg_engagement = avg_score
-        
-        # Category breakdown
-        category_stats = {}
-        for result in results:
-            cat = result['category']
-            if cat not in category_stats:
-                category_stats[cat] = []
-            category_stats[cat].append(result['critic_evaluation']['overall_score'])
+        avg_score, avg_accuracy, avg_completeness, avg_clarity, avg_usefulness, avg_engagement = (
+            float(mean) for mean in scores.mean(axis=0)
+        )
         
+        # Category breakdown, in order of first appearance
+        unique_categories, first_seen, inverse = np.unique(categories, return_index=True, return_inverse=True)
+        category_sums = np.bincount(inverse, weights=scores[:, 0])
+        category_counts = np.bincount(inverse)
         category_metrics = {
-            cat: {
-                "avg_score": round(statistics.mean(scores), 2),
-                "count": len(scores)
+            str(unique_categories[k]): {
+                "avg_score": round(float(category_sums[k] / category_counts[k]), 2),
+                "count": int(category_counts[k])
             }
-            for cat, scores in category_stats.items()
+            for k in np.argsort(first_seen)
         }
         
         report = {
@@ -321,7 +626,7 @@ Be objective and constructive."""
                 "engagement": round(avg_engagement, 2)
             },
             "category_performance": category_metrics,
-            "detailed_results": results
+            "detailed_log": CRITIC_RESULTS_PATH
         }
         
         # Print summary
@@ -342,10 +647,15 @@ Be objective and constructive."""
             print(f"   {cat}: {metrics['avg_score']:.1f}/100 ({metrics['count']} tasks)")
         
         # Save report
-        with open('evaluation/llm_critic_report.json', 'w') as f:
-            json.dump(report, f, indent=2)
+        with open(CRITIC_REPORT_PATH, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        
+        print(f"\n Report saved to: {CRITIC_REPORT_PATH}")
+        print(f" Per-task results: {CRITIC_RESULTS_PATH}")
         
-        print(f"\n Report saved to: evaluation/llm_critic_report.json")
+        if self.cache is not None:
+            stats = self.cache.stats
+            print(f" Critic cache: {stats['hits']} hits, {stats['misses']} misses")
         
         return report
     
@@ -363,10 +673,17 @@ Be objective and constructive."""
             return "F (Poor)"
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="LLM critic evaluation of the real agents")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Call the critic even when an identical prompt was evaluated before")
+    args = parser.parse_args()
+    
     print("Initializing LLM Critic AgentEval Framework...")
     print("Using Gemini 2.0 as expert evaluator\n")
     
-    evaluator = LLMCriticAgentEval()
+    evaluator = LLMCriticAgentEval(use_cache=not args.no_cache)
     report = evaluator.run_llm_critic_evaluation()
     
     print("\n\n" + "="*70)
@@ -374,5 +691,5 @@ if __name__ == "__main__":
     print("="*70)
     print(f"\nFinal Score: {report['summary']['average_critic_score']}/100")
     print(f"Grade: {report['summary']['grade']}")
-    print(f"\nView report: evaluation/llm_critic_report.json")
+    print(f"\nView report: {CRITIC_REPORT_PATH}")
     print(f"View in browser: http://localhost:5000/agenteval")
@@ -0,0 +1,67 @@
+"""
+Micro-batching wrapper for LangChain embeddings
+Concurrent embed_query calls from parallel evaluation tests are coalesced
+into one embed_documents call instead of many single-text inferences
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List
+
+
+class MicroBatchEmbeddings:
+    """
+    Embeddings proxy that queues embed_query calls and runs them in batches
+    on a background thread. Everything else is forwarded to the wrapped model.
+    """
+
+    def __init__(self, underlying, max_batch: int = 32, max_wait: float = 0.01):
+        """
+        Args:
+            underlying: Embeddings object with embed_documents/embed_query
+            max_batch: Largest number of queries embedded in one call
+            max_wait: Seconds to wait for more queries after the first arrives
+        """
+        self._underlying = underlying
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._queue = queue.Queue()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed one query, batched with any concurrent callers"""
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Document lists are already batched; call the model directly"""
+        return self._underlying.embed_documents(texts)
+
+    def __getattr__(self, name):
+        return getattr(self._underlying, name)
+
+    def _worker(self):
+        """Drain the queue every max_wait seconds or max_batch items"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._max_wait
+            while len(batch) < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                vectors = self._underlying.embed_documents([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
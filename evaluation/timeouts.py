@@ -0,0 +1,77 @@
+"""
+Per-component timeouts for the backend evaluation
+A hung LLM provider aborts the call (with one retry) instead of stalling the run
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, fields
+
+
+@dataclass
+class TimeoutConfig:
+    """Seconds allowed per backend call; override with LEARNLY_EVAL_TIMEOUT_<NAME>"""
+    learning: float = 60
+    agentic: float = 30
+    quiz: float = 90
+    slides: float = 120
+    flashcards: float = 90
+    exam: float = 60
+    retries: int = 1
+
+    @classmethod
+    def from_env(cls) -> "TimeoutConfig":
+        """Build a config with environment overrides applied"""
+        overrides = {}
+        for field in fields(cls):
+            value = os.getenv(f"LEARNLY_EVAL_TIMEOUT_{field.name.upper()}")
+            if value is not None:
+                overrides[field.name] = field.type(value)
+        return cls(**overrides)
+
+
+TIMEOUTS = TimeoutConfig.from_env()
+
+# The backend evaluation's queued logger, so timeout notices from worker
+# threads don't interleave with its output
+log = logging.getLogger("beval")
+
+
+def call_with_timeout(fn, timeout: float, *args, retries: int = TIMEOUTS.retries, **kwargs):
+    """
+    Call fn(*args, **kwargs), giving up after timeout seconds and retrying
+    on timeout. Calls run on daemon threads, so an abandoned call can't keep
+    the process alive.
+
+    Args:
+        fn: Backend function to call
+        timeout: Seconds to wait for each attempt
+        retries: Extra attempts after the first timeout
+
+    Returns:
+        Whatever fn returns
+
+    Raises:
+        TimeoutError: If every attempt timed out
+    """
+    attempts = retries + 1
+    for attempt in range(1, attempts + 1):
+        future = Future()
+
+        def target(future=future):
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=target, daemon=True).start()
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            log.info(f"   ⏱️  {fn.__name__} timed out after {timeout}s (attempt {attempt}/{attempts})")
+
+    raise TimeoutError(f"{fn.__name__} timed out after {attempts} attempts of {timeout}s")
@@ -10,6 +10,15 @@ from langchain_huggingface import HuggingFaceEmbeddings
 # ============= SETTINGS ============
 BOOKS_FOLDER = "./books"         # folder where your books are stored
 INDEX_FOLDER = "./chroma_index"  # root folder for embeddings
+# HNSW graph settings for every book collection (Chroma's defaults are
+# construction_ef=100, M=16, search_ef=10); rag_com/reindex.py applies
+# them to indexes built before these were set
+HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 200,
+    "hnsw:M": 32,
+    "hnsw:search_ef": 64,
+}
 # BOOK_NAME = "ec2"  # part of the book filename
 # ==================================
 
@@ -64,7 +73,8 @@ def indexer(embeddings, BOOK_NAME: str):
         db = Chroma.from_documents(
             documents=chunks,
             embedding=embeddings,
-            persist_directory=book_index_folder
+            persist_directory=book_index_folder,
+            collection_metadata=HNSW_METADATA
         )
         db.persist()
         print(f"Index for '{BOOK_NAME}' saved in {book_index_folder}")
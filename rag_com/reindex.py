@@ -0,0 +1,110 @@
+"""
+One-shot migration: rebuild existing Chroma book indexes with the tuned
+HNSW settings from rag_com/indexer.py
+
+Stored embeddings are copied as-is, so nothing is re-embedded.
+
+Usage:
+    python rag_com/reindex.py              # every book in INDEX_FOLDER
+    python rag_com/reindex.py <book_name>  # a single book
+"""
+
+import os
+import sys
+import shutil
+
+import chromadb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_com.indexer import HNSW_METADATA, INDEX_FOLDER
+
+
+# ============= SETTINGS ============
+COLLECTION_NAME = "langchain"  # collection name used by LangChain's Chroma
+BATCH_SIZE = 2000              # rows copied per get/add round trip
+# ==================================
+
+
+def is_tuned(collection) -> bool:
+    """Check whether a collection already carries the tuned HNSW settings"""
+    metadata = collection.metadata or {}
+    return all(metadata.get(key) == value for key, value in HNSW_METADATA.items())
+
+
+def reindex_book(book_index_folder: str) -> bool:
+    """
+    Copy a book's collection into a new one created with HNSW_METADATA,
+    then swap the new index folder in place of the old one
+
+    Args:
+        book_index_folder: Persist directory of the book's index
+
+    Returns:
+        True if the index was rebuilt, False if skipped or failed
+    """
+    old_client = chromadb.PersistentClient(path=book_index_folder)
+    try:
+        old = old_client.get_collection(COLLECTION_NAME)
+    except Exception as e:
+        print(f"Skipping {book_index_folder}: {e}")
+        return False
+
+    if is_tuned(old):
+        print(f"Already tuned: {book_index_folder}")
+        return False
+
+    tmp_folder = book_index_folder.rstrip(os.sep) + ".reindex"
+    shutil.rmtree(tmp_folder, ignore_errors=True)
+    new_client = chromadb.PersistentClient(path=tmp_folder)
+    metadata = {**(old.metadata or {}), **HNSW_METADATA}
+    new = new_client.create_collection(COLLECTION_NAME, metadata=metadata)
+
+    total = old.count()
+    for offset in range(0, total, BATCH_SIZE):
+        batch = old.get(
+            limit=BATCH_SIZE,
+            offset=offset,
+            include=["documents", "metadatas", "embeddings"]
+        )
+        new.add(
+            ids=batch["ids"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"],
+            embeddings=batch["embeddings"]
+        )
+        print(f"  copied {min(offset + BATCH_SIZE, total)}/{total}")
+
+    if new.count() != total:
+        print(f"Row count mismatch for {book_index_folder}; keeping the old index")
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+        return False
+
+    # Release file handles before moving the folders around
+    del old, new
+    old_client.clear_system_cache()
+    new_client.clear_system_cache()
+
+    backup_folder = book_index_folder.rstrip(os.sep) + ".bak"
+    os.replace(book_index_folder, backup_folder)
+    os.replace(tmp_folder, book_index_folder)
+    shutil.rmtree(backup_folder, ignore_errors=True)
+    print(f"Reindexed {book_index_folder} ({total} chunks)")
+    return True
+
+
+def main():
+    if len(sys.argv) > 1:
+        book_names = [sys.argv[1].replace(" ", "_")]
+    else:
+        book_names = sorted(
+            entry.name for entry in os.scandir(INDEX_FOLDER)
+            if entry.is_dir() and not entry.name.endswith((".reindex", ".bak"))
+        )
+
+    for book_name in book_names:
+        reindex_book(os.path.join(INDEX_FOLDER, book_name))
+    print("Reindexing done")
+
+
+if __name__ == "__main__":
+    main()
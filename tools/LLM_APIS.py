@@ -3,6 +3,9 @@ LLM API Integration Module
 Supports: Google Gemini and Groq
 """
 
+import json
+import re
+
 from google import genai
 from groq import Groq
 
@@ -35,6 +38,26 @@ def ask_gemini(prompt, model="models/gemini-2.5-flash"):
     except Exception as e:
         return f" Gemini Error: {e}"
 
+def parse_structured_response(raw_text):
+    """
+    Extract and parse the JSON object from raw LLM output.
+    
+    Args:
+        raw_text: Raw response text (may be wrapped in markdown code blocks)
+        
+    Returns:
+        dict: Parsed JSON response, or error dict
+    """
+    # Extract JSON from response (handles markdown code blocks)
+    match = re.search(r'\{.*\}', raw_text, re.DOTALL)
+    if not match:
+        return {"error": "No JSON found in response", "raw": raw_text}
+    
+    try:
+        return json.loads(match.group())
+    except json.JSONDecodeError as e:
+        return {"error": f"JSON parse error: {e}", "raw": raw_text}
+
 def ask_gemini_structured(prompt, model="models/gemini-2.5-flash", use_learning_key=False, history=None):
     """
     Query Google Gemini API with structured JSON response support.
@@ -48,9 +71,6 @@ def ask_gemini_structured(prompt, model="models/gemini-2.5-flash", use_learning_
     Returns:
         dict: Parsed JSON response from Gemini, or error dict
     """
-    import json
-    import re
-    
     try:
         api_key = GEMINI_LEARNING_API_KEY if use_learning_key else GEMINI_API_KEY
         client = genai.Client(api_key=api_key)
@@ -67,21 +87,41 @@ def ask_gemini_structured(prompt, model="models/gemini-2.5-flash", use_learning_
             contents=contents,
         )
         
-        raw_text = response.text.strip()
-        
-        # Extract JSON from response (handles markdown code blocks)
-        match = re.search(r'\{.*\}', raw_text, re.DOTALL)
-        if not match:
-            return {"error": "No JSON found in response", "raw": raw_text}
-        
-        parsed = json.loads(match.group())
-        return parsed
+        return parse_structured_response(response.text.strip())
     
-    except json.JSONDecodeError as e:
-        return {"error": f"JSON parse error: {e}", "raw": response.text if 'response' in locals() else ""}
     except Exception as e:
         return {"error": f"Gemini Error: {e}"}
 
+def ask_gemini_structured_stream(prompt, model="models/gemini-2.5-flash", use_learning_key=False, history=None):
+    """
+    Stream a structured JSON response from Google Gemini.
+    
+    Text chunks are yielded as they arrive so the caller can buffer them
+    without holding the full response object. Parse the accumulated text
+    with parse_structured_response once the stream is exhausted.
+    
+    Args:
+        prompt: The question or prompt to send
+        model: Gemini model to use (default: models/gemini-2.5-flash)
+        use_learning_key: Use the learning agent API key instead of default
+        history: Optional conversation history list of dicts with 'role' and 'content'
+        
+    Yields:
+        str: Response text chunks from Gemini
+    """
+    api_key = GEMINI_LEARNING_API_KEY if use_learning_key else GEMINI_API_KEY
+    client = genai.Client(api_key=api_key)
+    
+    contents = list(history) if history else []
+    contents.append(prompt)
+    
+    for chunk in client.models.generate_content_stream(
+        model=model,
+        contents=contents,
+    ):
+        if chunk.text:
+            yield chunk.text
+
 # ==================== GROQ API ====================
 
 def ask_groq(prompt, stream=True):
@@ -2,7 +2,10 @@ import os
 import sys
 import json
 import re
+import time
+import threading
 import requests
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from bs4 import BeautifulSoup
 
 # Add tools directory to path for imports
@@ -12,6 +15,9 @@ from groq import Groq
 from LLM_APIS import GROQ_API_KEY
 from web_search import RobustWebSearcher
 
+# Seconds to wait for both lookups before giving up on the slow one
+SEARCH_TIMEOUT = float(os.getenv("LEARNLY_SEARCH_TIMEOUT", "25"))
+
 
 # ------------------ LLM QUERY GENERATION ------------------
 
@@ -173,9 +179,12 @@ def search_web(query, max_chars=2000):
 
 # ------------------ WIKIPEDIA SEARCH ------------------
 
-def search_wikipedia(query, max_chars=2000):
+def search_wikipedia(query, max_chars=2000, session=None):
     print(f"📚 Searching Wikipedia for: {query}")
 
+    # A caller-provided requests.Session reuses its pooled connections
+    http = session or requests
+
     try:
         api_url = "https://en.wikipedia.org/w/api.php"
         headers = {
@@ -189,7 +198,7 @@ def search_wikipedia(query, max_chars=2000):
             "format": "json"
         }
 
-        r = requests.get(api_url, params=search_params, headers=headers, timeout=10)
+        r = http.get(api_url, params=search_params, headers=headers, timeout=10)
         if r.status_code != 200:
             print(" Wikipedia search failed: HTTP error\n")
             return None
@@ -212,7 +221,7 @@ def search_wikipedia(query, max_chars=2000):
             "titles": title
         }
 
-        summary_resp = requests.get(
+        summary_resp = http.get(
             api_url, params=summary_params, headers=headers, timeout=10
         ).json()
 
@@ -242,7 +251,40 @@ def search_wikipedia(query, max_chars=2000):
 
 # ------------------ UNIFIED SEARCH ------------------
 
-def unified_search(user_query, max_chars_per_source=1500):
+def _start_lookup(fn, *args):
+    """
+    Run a lookup on its own daemon thread and return its Future
+
+    Unlike a pool or a "with ThreadPoolExecutor" block, nothing waits on an
+    abandoned lookup: a caller that times out (e.g. learning_agent's 30s
+    alarm) returns right away, and a hung browser search can't hold a
+    shared worker that later searches would queue behind.
+    """
+    future = Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, daemon=True, name="unified-search").start()
+    return future
+
+
+def _result_before(future, deadline, label):
+    """Result of a lookup future, or None if it doesn't finish by the deadline"""
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        future.cancel()
+        print(f" {label} timed out after {SEARCH_TIMEOUT:.0f}s\n")
+        return None
+
+
+def unified_search(user_query, max_chars_per_source=1500, session=None):
     print("=" * 70)
     print("🔎 UNIFIED SEARCH")
     print("=" * 70)
@@ -251,8 +293,13 @@ def unified_search(user_query, max_chars_per_source=1500):
     print("🤖 Generating optimized queries with Groq...")
     queries = generate_search_queries(user_query)
 
-    web_result = search_web(queries["web_query"], max_chars_per_source)
-    wiki_result = search_wikipedia(queries["wiki_query"], max_chars_per_source)
+    # Web and Wikipedia lookups are independent, so run them side by side;
+    # a lookup still running at the deadline is abandoned, not awaited
+    deadline = time.monotonic() + SEARCH_TIMEOUT
+    web_future = _start_lookup(search_web, queries["web_query"], max_chars_per_source)
+    wiki_future = _start_lookup(search_wikipedia, queries["wiki_query"], max_chars_per_source, session)
+    web_result = _result_before(web_future, deadline, "Web search")
+    wiki_result = _result_before(wiki_future, deadline, "Wikipedia search")
 
     total_chars = 0
     if web_result: